@@ -25,7 +25,9 @@ Portal + backend build:
     "data": [
         "security/security.xml",
         "security/ir.model.access.csv",
+        "data/ir_cron_data.xml",
         "views/sale_order_views.xml",
+        "views/moyee_subscription_mass_action_views.xml",
         "views/portal_subscription_templates.xml",
         "views/portal_my_account_sub_templates.xml",
         "views/portal_my_account_templates.xml",
@@ -1,7 +1,5 @@
 # File: moyee_subscription_portal_manager/controllers/portal.py
 import logging
-import re
-import json
 from dateutil.relativedelta import relativedelta
 from urllib.parse import urlencode
 
@@ -14,36 +12,29 @@ from werkzeug.exceptions import NotFound
 _logger = logging.getLogger(__name__)
 
 
-def _moyee_sort_plans(plans):
-    if not plans:
-        return plans
-
-    def get_plan_rank(plan):
-        name = (plan.display_name or plan.name or "").lower().strip()
-        if name == "monthly" or name == "every month":
-            return 1
-        if "1 month" in name or "one month" in name or "1 monthly" in name:
-            return 2
-        if "2 month" in name or "two month" in name or "2 monthly" in name:
-            return 3
-        if "3 month" in name or "three month" in name or "3 monthly" in name:
-            return 4
-
-        match = re.search(r'(\d+)\s*month', name)
-        if match:
-            try:
-                val = int(match.group(1))
-                return val + 1
-            except ValueError:
-                pass
-
-        if "week" in name:
-            return 10
-
-        seq = getattr(plan, "sequence", 999)
-        return seq
-
-    return plans.sorted(key=get_plan_rank)
+# Lazily rendered /my/home sections: section key -> content template
+MOYEE_LAZY_SECTIONS = {
+    "orders": "moyee_subscription_portal_manager.portal_my_home_moyee_orders_content",
+    "invoices": "moyee_subscription_portal_manager.portal_my_home_moyee_invoices_content",
+    "faq": "moyee_subscription_portal_manager.portal_my_home_moyee_faq_content",
+    "brew_guides": "moyee_subscription_portal_manager.portal_my_home_moyee_brew_guides_content",
+    "catalog": "moyee_subscription_portal_manager.portal_my_home_moyee_catalog_content",
+}
+# "Load more" pages of the keyset-paginated sections
+MOYEE_LAZY_SECTION_PAGES = {
+    "orders": "moyee_subscription_portal_manager.portal_my_home_moyee_orders_page",
+    "invoices": "moyee_subscription_portal_manager.portal_my_home_moyee_invoices_page",
+}
+
+
+def _moyee_get_portal_config():
+    """Cached portal config bundle for the current website's company (a private copy)."""
+    website = getattr(request, "website", False)
+    company = website and website.company_id or request.env.company
+    bundle = request.env["res.config.settings"].sudo()._moyee_get_portal_config_bundle(
+        company.id, website.id if website else False,
+    )
+    return dict(bundle)
 
 
 # ============================================================
@@ -61,7 +52,6 @@ class MoyeePortalHome(CustomerPortal):
             return values
 
         partner = request.env.user.partner_id
-        commercial = partner.commercial_partner_id
 
         # ── Active subscription ──
         SaleOrder = request.env["sale.order"].sudo()
@@ -74,51 +64,14 @@ class MoyeePortalHome(CustomerPortal):
         current_plan_id = False
         is_paused = False
         available_plans = SaleOrder.browse()
-        available_products = request.env["product.product"].browse()
         countries = request.env["res.country"].browse()
-        min_price = 0.0
-        max_price = 0.0
-
-        current_website = getattr(request, "website", False)
-        current_company_id = current_website and current_website.company_id.id or request.env.company.id
 
-        # Find the user's active subscription order
-        sub_domain = [
-            ("partner_id.commercial_partner_id", "=", commercial.id),
-            ("state", "in", ("sale", "done")),
-        ]
-        if current_company_id:
-            sub_domain.append(("company_id", "=", current_company_id))
-        # Odoo 18: subscription_state in active states
-        if "subscription_state" in SaleOrder._fields:
-            sub_domain.append(("subscription_state", "in", ("3_progress", "4_paused", "2_renewal")))
-        elif "is_subscription" in SaleOrder._fields:
-            sub_domain.append(("is_subscription", "=", True))
-
-        subscriptions = SaleOrder.search(sub_domain, order="id desc")
-        if subscriptions:
-            sub_id = kw.get("sub_id")
-            if sub_id:
-                try:
-                    requested_sub = subscriptions.filtered(lambda s: s.id == int(sub_id))
-                    if requested_sub:
-                        active_subscription = requested_sub[0]
-                    else:
-                        active_subscription = subscriptions[0]
-                except Exception as e:
-                    _logger.warning("Moyee: Failed to resolve requested subscription ID %s: %s", sub_id, str(e))
-                    active_subscription = subscriptions[0]
-            else:
-                active_subscription = subscriptions[0]
+        subscriptions, active_subscription = self._moyee_get_home_subscriptions(sub_id=kw.get("sub_id"))
+        if active_subscription:
             has_subscription = True
 
             # Visible lines (include active lines with quantity > 0)
-            visible_lines = active_subscription.order_line.filtered(
-                lambda l: (
-                    l.display_type
-                    or (not l.x_moyee_is_removed and float(l.product_uom_qty or 0.0) > 0.0)
-                )
-            )
+            visible_lines = active_subscription._moyee_get_visible_lines()
 
             # Next date
             next_date_field = active_subscription._moyee_get_subscription_next_date_field_name()
@@ -143,20 +96,12 @@ class MoyeePortalHome(CustomerPortal):
             # Hard fallback for plans
             if not available_plans and plan_field_name and plan_field_name in active_subscription._fields:
                 try:
-                    plan_model = active_subscription._fields[plan_field_name].comodel_name
-                    Plan = request.env[plan_model].sudo()
-                    company_ids = request.env["res.company"].sudo().search([]).ids
-                    Plan = Plan.with_context(allowed_company_ids=company_ids, active_test=False)
-                    domain = []
-                    if "company_id" in Plan._fields and getattr(active_subscription, "company_id", False):
-                        domain = [("company_id", "in", [False, active_subscription.company_id.id])]
-                    order_by = "sequence, name, id" if "sequence" in Plan._fields else "name, id"
-                    available_plans = Plan.search(domain, order=order_by)
+                    available_plans = active_subscription._moyee_get_company_plans()
                 except Exception:
                     _logger.exception("Moyee: Failed to fetch fallback plans.")
 
             if available_plans:
-                available_plans = _moyee_sort_plans(available_plans)
+                available_plans = request.env["sale.order"]._moyee_sort_plans(available_plans)
 
             # Paused state
             if "subscription_state" in active_subscription._fields and active_subscription.subscription_state == "4_paused":
@@ -170,66 +115,9 @@ class MoyeePortalHome(CustomerPortal):
                             is_paused = True
                             break
 
-            # Available products (for "Add product" popup)
-            try:
-                addable_products = active_subscription._moyee_get_portal_addable_products()
-                existing_products = active_subscription.order_line.filtered(
-                    lambda l: not l.x_moyee_is_removed 
-                    and not l.display_type 
-                    and l.product_id 
-                    and not getattr(l, 'is_delivery', False)
-                    and not getattr(l.product_id, 'is_delivery', False)
-                    and getattr(l.product_id, 'type', '') != 'service'
-                    and getattr(l.product_id, 'detailed_type', '') != 'service'
-                    and not any(kw in (l.product_id.name or l.name or '').lower() for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups', 'discount', 'promo', 'coupon'))
-                ).mapped("product_id")
-                addable_products = addable_products.filtered(
-                    lambda p: not getattr(p, 'is_delivery', False)
-                    and getattr(p, 'type', '') != 'service'
-                    and getattr(p, 'detailed_type', '') != 'service'
-                    and not any(kw in (p.name or '').lower() for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups', 'discount', 'promo', 'coupon'))
-                )
-                available_products = addable_products | existing_products
-            except Exception:
-                _logger.exception("Moyee: Failed to get portal addable products.")
-
             # Countries (for "Change address" popup)
             countries = request.env["res.country"].sudo().search([], order="name, id")
 
-            # Price filters
-            if available_products:
-                prices = available_products.mapped("lst_price") or [0.0]
-                min_price = min(prices)
-                max_price = max(prices)
-
-        # ── Recent orders ──
-        order_domain = [
-            ("partner_id.commercial_partner_id", "=", commercial.id),
-            ("state", "in", ("sale", "done", "cancel")),
-        ]
-        if current_company_id:
-            order_domain.append(("company_id", "=", current_company_id))
-        recent_orders = SaleOrder.search(order_domain, order="date_order desc, id desc")
-
-        # ── Recent invoices ──
-        AccountMove = request.env["account.move"].sudo()
-        inv_domain = [
-            ("partner_id.commercial_partner_id", "=", commercial.id),
-            ("move_type", "in", ("out_invoice", "out_refund")),
-            ("state", "=", "posted"),
-        ]
-        if current_company_id:
-            inv_domain.append(("company_id", "=", current_company_id))
-        recent_invoices = AccountMove.search(inv_domain, order="invoice_date desc, id desc")
-
-        # ── Portal FAQs ──
-        PortalFaq = request.env["moyee.portal.faq"].sudo()
-        faqs = PortalFaq.search([("is_active", "=", True)])
-
-        # ── Portal Brew Guides ──
-        PortalBrewGuide = request.env["moyee.portal.brew.guide"].sudo()
-        brew_guides = PortalBrewGuide.search([("is_active", "=", True)])
-
         # ── Close Reasons ──
         close_reasons = []
         if "close_reason_id" in request.env["sale.order"]._fields:
@@ -240,78 +128,8 @@ class MoyeePortalHome(CustomerPortal):
         moyee_home_message = kw.get("moyee_message", "")
         moyee_home_error = kw.get("moyee_error", "")
 
-        # Fetch configuration parameters
-        ICP = request.env["ir.config_parameter"].sudo()
-
-        def _get_bool(param_name, default=True):
-            val = ICP.get_param(param_name, str(default))
-            return val.lower() in ("true", "1", "yes")
-
-        moyee_config = {
-            "primary_color": ICP.get_param("moyee_subscription_portal_manager.primary_color", "#E91E8C"),
-            "secondary_color": ICP.get_param("moyee_subscription_portal_manager.secondary_color", "#FCE4F3"),
-            "font_family": ICP.get_param("moyee_subscription_portal_manager.font_family", "system-ui"),
-            "show_subscription": _get_bool("moyee_subscription_portal_manager.show_subscription", True),
-            "show_overview": _get_bool("moyee_subscription_portal_manager.show_overview", True),
-            "show_orders": _get_bool("moyee_subscription_portal_manager.show_orders", True),
-            "show_invoices": _get_bool("moyee_subscription_portal_manager.show_invoices", True),
-            "show_faq": _get_bool("moyee_subscription_portal_manager.show_faq", True),
-            "show_inspire": _get_bool("moyee_subscription_portal_manager.show_inspire", True),
-            "show_taf": _get_bool("moyee_subscription_portal_manager.show_taf", True),
-            "show_brew_guides": _get_bool("moyee_subscription_portal_manager.show_brew_guides", True),
-            "brew_guides_all_url": ICP.get_param("moyee_subscription_portal_manager.brew_guides_all_url", "/shop"),
-            "show_sidebar_profile": _get_bool("moyee_subscription_portal_manager.show_sidebar_profile", True),
-            "show_sidebar_upsell": _get_bool("moyee_subscription_portal_manager.show_sidebar_upsell", True),
-            "show_sidebar_support": _get_bool("moyee_subscription_portal_manager.show_sidebar_support", True),
-            "upsell_cta_url": ICP.get_param("moyee_subscription_portal_manager.upsell_cta_url", "/shop"),
-            "support_email": ICP.get_param("moyee_subscription_portal_manager.support_email", "hello@moyeecoffee.com"),
-            "inspire_eyebrow": ICP.get_param("moyee_subscription_portal_manager.inspire_eyebrow", "Do you know where your coffee comes from?"),
-            "inspire_title": ICP.get_param("moyee_subscription_portal_manager.inspire_title", "Your coffee comes from Ethiopia"),
-            "inspire_body": ICP.get_param("moyee_subscription_portal_manager.inspire_body", "Your Moyee coffee comes from small farmers in the Kaffa forest in Ethiopia. They receive a fair price — thanks to you."),
-            "inspire_btn1_text": ICP.get_param("moyee_subscription_portal_manager.inspire_btn1_text", "Read the story"),
-            "inspire_btn1_url": ICP.get_param("moyee_subscription_portal_manager.inspire_btn1_url", "/radical-impact-coffee"),
-            "inspire_btn2_text": ICP.get_param("moyee_subscription_portal_manager.inspire_btn2_text", "Browse our coffee"),
-            "inspire_btn2_url": ICP.get_param("moyee_subscription_portal_manager.inspire_btn2_url", "/shop"),
-        }
+        moyee_config = self._moyee_get_portal_config()
 
-        # Variant map for front-end cascading selections
-        variant_map = []
-        if active_subscription:
-            try:
-                existing_products = active_subscription.order_line.filtered(
-                    lambda l: not l.x_moyee_is_removed 
-                    and not l.display_type 
-                    and l.product_id 
-                    and not getattr(l, 'is_delivery', False)
-                    and not getattr(l.product_id, 'is_delivery', False)
-                    and getattr(l.product_id, 'type', '') != 'service'
-                    and getattr(l.product_id, 'detailed_type', '') != 'service'
-                    and not any(kw in (l.product_id.name or l.name or '').lower() for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups', 'discount', 'promo', 'coupon'))
-                ).mapped("product_id")
-                all_possible_products = (available_products | existing_products).filtered(
-                    lambda p: not getattr(p, 'is_delivery', False)
-                    and getattr(p, 'type', '') != 'service'
-                    and getattr(p, 'detailed_type', '') != 'service'
-                    and not any(kw in (p.name or '').lower() for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups', 'discount', 'promo', 'coupon'))
-                )
-                for p in all_possible_products:
-                    grind, weight = active_subscription.moyee_extract_product_metadata(p)
-                    bold, fruity = active_subscription.moyee_extract_coffee_characteristics(p)
-                    tmpl_name = p.product_tmpl_id.name or ''
-                    tmpl_name = tmpl_name.replace('(Subscription)', '').replace('(subscription)', '').replace('(SUBSCRIPTION)', '')
-                    tmpl_name = tmpl_name.strip()
-                    variant_map.append({
-                        "id": p.id,
-                        "tmpl_id": p.product_tmpl_id.id,
-                        "tmpl_name": tmpl_name,
-                        "grind": grind,
-                        "weight": weight,
-                        "bold": bold,
-                        "fruity": fruity,
-                    })
-            except Exception:
-                _logger.exception("Moyee: Failed to build variant map.")
-        variant_map_json = json.dumps(variant_map)
         # Precompute pause options resume dates
         pause_options = []
         base_date = next_date_value or fields.Date.today()
@@ -338,38 +156,248 @@ class MoyeePortalHome(CustomerPortal):
             "current_plan_id": current_plan_id,
             "is_paused": is_paused,
             "available_plans": available_plans,
-            "available_products": available_products,
             "countries": countries,
-            "min_price": min_price,
-            "max_price": max_price,
-            "recent_orders": recent_orders,
-            "recent_invoices": recent_invoices,
             "subscriptions": subscriptions,
-            "faqs": faqs,
-            "brew_guides": brew_guides,
             "moyee_home_message": moyee_home_message,
             "moyee_home_error": moyee_home_error,
             "moyee_config": moyee_config,
-            "variant_map_json": variant_map_json,
             "pause_options": pause_options,
             "close_reasons": close_reasons,
         })
         return values
 
+    # ============================================================
+    # Shared helpers (page shell + lazy sections)
+    # ============================================================
+    def _moyee_get_home_domain_context(self):
+        """Return (commercial partner, company id) scoping every /my/home query."""
+        commercial = request.env.user.partner_id.commercial_partner_id
+        current_website = getattr(request, "website", False)
+        current_company_id = current_website and current_website.company_id.id or request.env.company.id
+        return commercial, current_company_id
+
+    def _moyee_get_home_subscriptions(self, sub_id=None):
+        """Return (subscriptions, active subscription) of the logged-in customer."""
+        SaleOrder = request.env["sale.order"].sudo()
+        commercial, current_company_id = self._moyee_get_home_domain_context()
+
+        # Find the user's active subscription order
+        sub_domain = [
+            ("x_moyee_commercial_partner_id", "=", commercial.id),
+            ("state", "in", ("sale", "done")),
+            ("is_subscription_order", "=", True),
+        ]
+        if current_company_id:
+            sub_domain.append(("company_id", "=", current_company_id))
+        # Odoo 18: subscription_state in active states
+        if "subscription_state" in SaleOrder._fields:
+            sub_domain.append(("subscription_state", "in", ("3_progress", "4_paused", "2_renewal")))
+
+        subscriptions = SaleOrder.search(sub_domain, order="id desc")
+        if not subscriptions:
+            return subscriptions, False
+
+        active_subscription = subscriptions[0]
+        if sub_id:
+            try:
+                requested_sub = subscriptions.filtered(lambda s: s.id == int(sub_id))
+                if requested_sub:
+                    active_subscription = requested_sub[0]
+            except Exception as e:
+                _logger.warning("Moyee: Failed to resolve requested subscription ID %s: %s", sub_id, str(e))
+        return subscriptions, active_subscription
+
+    def _moyee_get_portal_config(self):
+        return _moyee_get_portal_config()
+
+    # ============================================================
+    # Lazy /my/home sections (fetched by moyee_my_account.js)
+    # ============================================================
+    def _moyee_keyset_page(self, model, domain, date_field, cursor=None):
+        """
+        Return one page of `model` ordered by (date_field desc, id desc).
+
+        The continuation token is "<date>|<id>" of the last record served, so
+        the next page is a plain index range scan instead of an OFFSET.
+        Returns (records, total, next_cursor); total is only counted for the first page.
+        """
+        limit = self._moyee_get_portal_config()["page_size"]
+        converter = fields.Datetime if model._fields[date_field].type == "datetime" else fields.Date
+        domain = list(domain) + [(date_field, "!=", False)]
+        total = model.search_count(domain) if not cursor else False
+
+        if cursor:
+            try:
+                cursor_date, cursor_id = cursor.rsplit("|", 1)
+                cursor_id = int(cursor_id)
+                cursor_date = converter.to_string(converter.from_string(cursor_date))
+            except (AttributeError, TypeError, ValueError):
+                raise NotFound()
+            domain += [
+                "|",
+                (date_field, "<", cursor_date),
+                "&", (date_field, "=", cursor_date), ("id", "<", cursor_id),
+            ]
+
+        records = model.search(domain, order="%s desc, id desc" % date_field, limit=limit + 1)
+        next_cursor = False
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            next_cursor = "%s|%s" % (converter.to_string(last[date_field]), last.id)
+        return records, total, next_cursor
+
+    def _moyee_prepare_section_orders(self, cursor=None, **kw):
+        commercial, current_company_id = self._moyee_get_home_domain_context()
+        order_domain = [
+            ("x_moyee_commercial_partner_id", "=", commercial.id),
+            ("state", "in", ("sale", "done", "cancel")),
+        ]
+        if current_company_id:
+            order_domain.append(("company_id", "=", current_company_id))
+        recent_orders, total, next_cursor = self._moyee_keyset_page(
+            request.env["sale.order"].sudo(), order_domain, "date_order", cursor=cursor,
+        )
+        return {
+            "recent_orders": recent_orders,
+            "total": total,
+            "shown_count": len(recent_orders),
+            "next_cursor": next_cursor,
+        }
+
+    def _moyee_prepare_section_invoices(self, cursor=None, **kw):
+        commercial, current_company_id = self._moyee_get_home_domain_context()
+        inv_domain = [
+            ("commercial_partner_id", "=", commercial.id),
+            ("move_type", "in", ("out_invoice", "out_refund")),
+            ("state", "=", "posted"),
+        ]
+        if current_company_id:
+            inv_domain.append(("company_id", "=", current_company_id))
+        recent_invoices, total, next_cursor = self._moyee_keyset_page(
+            request.env["account.move"].sudo(), inv_domain, "invoice_date", cursor=cursor,
+        )
+        return {
+            "recent_invoices": recent_invoices,
+            "total": total,
+            "shown_count": len(recent_invoices),
+            "next_cursor": next_cursor,
+        }
+
+    def _moyee_prepare_section_faq(self, **kw):
+        return {"faqs": request.env["moyee.portal.faq"].sudo().search([("is_active", "=", True)])}
+
+    def _moyee_prepare_section_brew_guides(self, **kw):
+        return {
+            "brew_guides": request.env["moyee.portal.brew.guide"].sudo().search([("is_active", "=", True)]),
+            "moyee_config": self._moyee_get_portal_config(),
+        }
+
+    def _moyee_prepare_section_catalog(self, sub_id=None, **kw):
+        available_products = request.env["product.product"].browse()
+        min_price = 0.0
+        max_price = 0.0
+        variant_map = []
+
+        _subscriptions, active_subscription = self._moyee_get_home_subscriptions(sub_id=sub_id)
+        if active_subscription:
+            # Available products (for "Add product" popup)
+            try:
+                addable_products = active_subscription._moyee_get_portal_addable_products()
+                existing_products = active_subscription.order_line.filtered(
+                    lambda l: not l.x_moyee_is_removed
+                    and not l.display_type
+                    and l.product_id
+                    and l.x_moyee_line_role != "delivery"
+                    and l.product_id.x_moyee_portal_visible
+                ).mapped("product_id")
+                available_products = addable_products | existing_products
+            except Exception:
+                _logger.exception("Moyee: Failed to get portal addable products.")
+
+            # Price filters
+            if available_products:
+                prices = available_products.mapped("lst_price") or [0.0]
+                min_price = min(prices)
+                max_price = max(prices)
+
+            # Variant map for front-end cascading selections
+            try:
+                # product.product.name is the template name; classification is stored on the variant
+                Product = request.env["product.product"].sudo()
+                variant_rows = Product.search_read(
+                    [("id", "in", available_products.ids)],
+                    ["name", "product_tmpl_id", "x_moyee_grind", "x_moyee_weight", "x_moyee_bold", "x_moyee_fruity"],
+                )
+                # Same index the edit POST resolves against, so the modal only offers reachable combinations
+                variant_keys = Product._moyee_get_variant_index()[1]
+                for row in variant_rows:
+                    key = variant_keys.get(row["id"])
+                    if key:
+                        row["x_moyee_grind"], row["x_moyee_weight"] = key[1], key[2]
+                    tmpl_name = row["name"] or ''
+                    tmpl_name = tmpl_name.replace('(Subscription)', '').replace('(subscription)', '').replace('(SUBSCRIPTION)', '')
+                    tmpl_name = tmpl_name.strip()
+                    variant_map.append({
+                        "id": row["id"],
+                        "tmpl_id": row["product_tmpl_id"][0] if row["product_tmpl_id"] else False,
+                        "tmpl_name": tmpl_name,
+                        "grind": row["x_moyee_grind"] or "other",
+                        "weight": row["x_moyee_weight"] or "other",
+                        "bold": row["x_moyee_bold"] or "other",
+                        "fruity": row["x_moyee_fruity"] or "other",
+                    })
+            except Exception:
+                _logger.exception("Moyee: Failed to build variant map.")
+
+        return {
+            "active_subscription": active_subscription,
+            "available_products": available_products,
+            "min_price": min_price,
+            "max_price": max_price,
+            "variant_map": variant_map,
+        }
+
+    @http.route("/my/moyee/section/<string:section>", type="json", auth="user", website=True)
+    def moyee_home_section(self, section, cursor=None, **kw):
+        """
+        Render one /my/home section on demand; returns {"html": ...}.
+        Paginated sections also return "next_cursor" (+ "total" on the first page);
+        the catalog also returns "variants".
+        """
+        if cursor:
+            template = MOYEE_LAZY_SECTION_PAGES.get(section)
+        else:
+            template = MOYEE_LAZY_SECTIONS.get(section)
+        if not template or not self._is_moyee_redesign_active_for_user():
+            raise NotFound()
+        if cursor:
+            kw["cursor"] = cursor
+
+        values = getattr(self, "_moyee_prepare_section_%s" % section)(**kw)
+        values.update({
+            "request": request,
+            "partner": request.env.user.partner_id,
+        })
+        result = {"html": str(request.env["ir.ui.view"]._render_template(template, values))}
+        if "variant_map" in values:
+            result["variants"] = values["variant_map"]
+        if "next_cursor" in values:
+            result["next_cursor"] = values["next_cursor"]
+            if values.get("total") is not False:
+                result["total"] = values["total"]
+        return result
+
     def _is_moyee_redesign_active_for_user(self):
         company = getattr(request, "website", False) and request.website.company_id or request.env.company
         company_sudo = company.sudo()
-        
+        moyee_config = self._moyee_get_portal_config()
+
         # Hardcode company check: only allow for Moyee Coffee
-        if company and "Moyee Coffee" not in company.name:
+        if not moyee_config["redesign_company"]:
             return False
 
-        enable_user_filter = False
-        if "moyee_enable_user_filter" in company_sudo._fields:
-            try:
-                enable_user_filter = bool(company_sudo.moyee_enable_user_filter)
-            except Exception:
-                enable_user_filter = False
+        enable_user_filter = moyee_config["enable_user_filter"]
 
         if enable_user_filter and "moyee_redesign_partner_ids" in company_sudo._fields:
             try:
@@ -411,13 +439,12 @@ class MoyeePortalHome(CustomerPortal):
 
                 SaleOrder = request.env["sale.order"].sudo()
                 sub_domain = [
-                    ("partner_id.commercial_partner_id", "=", commercial.id),
+                    ("x_moyee_commercial_partner_id", "=", commercial.id),
                     ("state", "in", ("sale", "done")),
+                    ("is_subscription_order", "=", True),
                 ]
                 if "subscription_state" in SaleOrder._fields:
                     sub_domain.append(("subscription_state", "in", ("3_progress", "4_paused", "2_renewal")))
-                elif "is_subscription" in SaleOrder._fields:
-                    sub_domain.append(("is_subscription", "=", True))
 
                 subscriptions = SaleOrder.search(sub_domain)
                 for sub in subscriptions:
@@ -532,32 +559,12 @@ class MoyeeSubscriptionPortal(http.Controller):
     # ------------------------------------------------------------
     def _moyee_get_all_plans_portal_safe(self, order):
         """
-        Universal fallback:
-        - Detect which plan field exists on sale.order (your DB uses plan_id)
-        - Search plan model with portal-safe context (all companies, include inactive)
+        Universal fallback: every plan of the order company (global plans
+        included, inactive too), from the memoized per-company plan list.
         """
-        plan_field = False
-        if hasattr(order, "_moyee_get_recurring_plan_field_name"):
-            plan_field = order._moyee_get_recurring_plan_field_name()
-
-        if not plan_field or plan_field not in order._fields:
+        if not hasattr(order, "_moyee_get_company_plans"):
             return request.env["ir.model"].browse([])
-
-        plan_model = order._fields[plan_field].comodel_name
-        Plan = request.env[plan_model].sudo()
-
-        # portal-safe context
-        company_ids = request.env["res.company"].sudo().search([]).ids
-        Plan = Plan.with_context(allowed_company_ids=company_ids, active_test=False)
-
-        # ✅ IMPORTANT: for sale.subscription.plan, company_id may exist (depends on build/customizations)
-        # Default: global + order company
-        domain = []
-        if "company_id" in Plan._fields and getattr(order, "company_id", False):
-            domain = [("company_id", "in", [False, order.company_id.id])]
-
-        order_by = "sequence, name, id" if "sequence" in Plan._fields else "name, id"
-        return Plan.search(domain, order=order_by)
+        return order._moyee_get_company_plans()
 
     # ------------------------------------------------------------
     # Page
@@ -582,18 +589,9 @@ class MoyeeSubscriptionPortal(http.Controller):
             lambda l: not l.x_moyee_is_removed 
             and not l.display_type 
             and l.product_id 
-            and not getattr(l, 'is_delivery', False)
-            and not getattr(l.product_id, 'is_delivery', False)
-            and getattr(l.product_id, 'type', '') != 'service'
-            and getattr(l.product_id, 'detailed_type', '') != 'service'
-            and not any(kw in (l.product_id.name or l.name or '').lower() for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups', 'discount', 'promo', 'coupon'))
+            and l.x_moyee_line_role != "delivery"
+            and l.product_id.x_moyee_portal_visible
         ).mapped("product_id")
-        addable_products = addable_products.filtered(
-            lambda p: not getattr(p, 'is_delivery', False)
-            and getattr(p, 'type', '') != 'service'
-            and getattr(p, 'detailed_type', '') != 'service'
-            and not any(kw in (p.name or '').lower() for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups', 'discount', 'promo', 'coupon'))
-        )
         available_products = addable_products | existing_products
 
         # Try model-level logic first
@@ -604,7 +602,7 @@ class MoyeeSubscriptionPortal(http.Controller):
             available_plans = self._moyee_get_all_plans_portal_safe(order)
 
         if available_plans:
-            available_plans = _moyee_sort_plans(available_plans)
+            available_plans = request.env["sale.order"]._moyee_sort_plans(available_plans)
 
         # template-friendly plan info
         plan_field_name = False
@@ -623,9 +621,7 @@ class MoyeeSubscriptionPortal(http.Controller):
             len(available_plans),
         )
 
-        visible_lines = order.order_line.filtered(
-            lambda l: l.display_type or (not l.x_moyee_is_removed and float(l.product_uom_qty or 0.0) > 0.0)
-        )
+        visible_lines = order._moyee_get_visible_lines()
 
         countries = request.env["res.country"].sudo().search([], order="name, id")
 
@@ -671,6 +667,7 @@ class MoyeeSubscriptionPortal(http.Controller):
             "moyee_error": kw.get("moyee_error"),
             "close_reasons": close_reasons,
             "access_token": access_token,
+            "moyee_config": _moyee_get_portal_config(),
         }
         return request.render("moyee_subscription_portal_manager.portal_subscription_manage", values)
 
@@ -871,6 +868,33 @@ class MoyeeSubscriptionPortal(http.Controller):
             return self._moyee_redirect_back(order, error=str(e), access_token=access_token)
         return self._moyee_redirect_back(order, message=_("Quantity updated successfully."), access_token=access_token)
 
+    @http.route(
+        [
+            "/my/subscriptions/<int:order_id>/moyee/batch",
+            "/my/subscription/<int:order_id>/moyee/batch",
+        ],
+        type="json",
+        auth="public",
+        website=True,
+        methods=["POST"],
+    )
+    def moyee_subscription_batch(self, order_id, operations=None, access_token=None, **kw):
+        """
+        Apply several subscription changes in one round-trip.
+        Body params: {"operations": [{"op": "update_qty", "line_id": 12, "qty": 2}, ...]}
+        Returns {"success": True, "subscription": {...}} or {"success": False, "error": "..."}.
+        """
+        order = self._moyee_get_order_sudo(order_id, access_token=access_token, require_subscription=True)
+        try:
+            snapshot = order.moyee_portal_apply_batch(
+                portal_user_id=request.env.user.id,
+                operations=operations,
+                access_token=access_token,
+            )
+        except (AccessError, UserError, ValidationError, ValueError) as e:
+            return {"success": False, "error": str(e)}
+        return {"success": True, "subscription": snapshot}
+
     @http.route(
         [
             "/my/subscriptions/<int:order_id>/pause",
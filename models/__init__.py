@@ -1,7 +1,20 @@
 # File: moyee_subscription_portal_manager/models/__init__.py
+from . import moyee_cache
 from . import sale_order
 from . import sale_order_line
 from . import account_move
+from . import moyee_attribute_classifier
+from . import moyee_shipping_rate_cache
+from . import moyee_subscription_line_archive
+from . import moyee_subscription_mass_action
+from . import moyee_subscription_mass_job
+from . import moyee_subscription_note
+from . import product_product
+from . import product_template
+from . import product_attribute
+from . import product_tag
+from . import sale_subscription_plan
 from . import res_config_settings
+from . import ir_config_parameter
 from . import moyee_portal_faq
 from . import moyee_portal_brew_guide
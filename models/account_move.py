@@ -1,9 +1,21 @@
 # File: moyee_subscription_portal_manager/models/account_move.py
 from odoo import models
+from odoo.tools.sql import create_index
 
 class AccountMove(models.Model):
     _inherit = "account.move"
 
+    def init(self):
+        super().init()
+        # /my/home invoices section: posted customer invoices of one commercial partner, newest first
+        create_index(
+            self.env.cr,
+            "account_move_moyee_portal_invoice_idx",
+            self._table,
+            ["commercial_partner_id", "company_id", "invoice_date DESC", "id DESC"],
+            where="move_type IN ('out_invoice', 'out_refund') AND state = 'posted'",
+        )
+
     def _get_moyee_portal_invoice_status(self):
         self.ensure_one()
         state = self.payment_state or ''
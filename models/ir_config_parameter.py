@@ -0,0 +1,34 @@
+# File: moyee_subscription_portal_manager/models/ir_config_parameter.py
+from odoo import api, models
+
+from .res_config_settings import MOYEE_CONFIG_PARAM_PREFIX
+
+
+class IrConfigParameter(models.Model):
+    _inherit = "ir.config_parameter"
+
+    # ============================================================
+    # The portal config bundle is kept in the dedicated "config" cache
+    # ============================================================
+    def _moyee_clear_portal_config(self, keys):
+        if any((key or "").startswith(MOYEE_CONFIG_PARAM_PREFIX) for key in keys):
+            self.env["moyee.cache"]._moyee_clear("config")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        params = super().create(vals_list)
+        self._moyee_clear_portal_config(params.mapped("key"))
+        return params
+
+    def write(self, vals):
+        keys = self.mapped("key")
+        res = super().write(vals)
+        if {"key", "value"}.intersection(vals):
+            self._moyee_clear_portal_config(keys + [vals.get("key")])
+        return res
+
+    def unlink(self):
+        keys = self.mapped("key")
+        res = super().unlink()
+        self._moyee_clear_portal_config(keys)
+        return res
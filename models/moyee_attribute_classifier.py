@@ -0,0 +1,165 @@
+# File: moyee_subscription_portal_manager/models/moyee_attribute_classifier.py
+import logging
+import re
+
+from odoo import api, models, tools
+
+_logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Declarative rule table
+# ------------------------------------------------------------
+# dimension -> attribute-name keywords -> ordered (label, value keywords).
+# Keywords are lower-case substrings, Dutch and English side by side.
+# The first label whose keywords appear in a value wins.
+#   compact:  match against the value with spaces stripped ("1 kg" -> "1kg")
+#   fallback: product field scanned when no attribute decided the dimension
+#   default:  label used when nothing matched at all (unless the caller
+#             asks for no defaults, then the label is "")
+# ============================================================
+MOYEE_CLASSIFIER_RULES = {
+    "grind": {
+        "attributes": ("grind", "maling", "brew", "hoe zet je", "how do you brew"),
+        "values": (
+            ("capsules", ("capsule", "cup")),
+            ("whole", ("whole", "boon", "bonen")),
+            ("filter", ("filter",)),
+            ("espresso", ("espresso",)),
+        ),
+        "compact": False,
+        "fallback": "display_name",
+        "default": "whole",
+    },
+    "weight": {
+        "attributes": ("weight", "size", "gewicht", "inhoud"),
+        "values": (
+            ("25caps", ("capsule", "cups", "25caps")),
+            ("1kg", ("1kg", "1.0kg", "1000g")),
+            ("250g", ("250g", "250", "0.25kg")),
+        ),
+        "compact": True,
+        "fallback": "display_name",
+        "default": "1kg",
+    },
+    "bold": {
+        "attributes": ("bold", "sterkte", "strength"),
+        "values": (
+            ("light", ("light", "mild")),
+            ("medium", ("medium",)),
+            ("bold", ("bold", "donker", "intens", "dark")),
+        ),
+        "compact": False,
+        "fallback": "name",
+        "default": "other",
+    },
+    "fruity": {
+        "attributes": ("fruity", "vol of fruitig", "smaak", "flavor"),
+        "values": (
+            ("full", ("full", "vol")),
+            ("fruity", ("fruity", "fruitig")),
+        ),
+        "compact": False,
+        "fallback": "name",
+        "default": "other",
+    },
+}
+
+
+def _moyee_keywords_regex(keywords):
+    return re.compile("|".join(re.escape(kw) for kw in keywords))
+
+
+def _moyee_compile_classifier_rules():
+    compiled = []
+    for dimension, rule in MOYEE_CLASSIFIER_RULES.items():
+        compiled.append((
+            dimension,
+            _moyee_keywords_regex(rule["attributes"]),
+            tuple((label, _moyee_keywords_regex(kws)) for label, kws in rule["values"]),
+            rule["compact"],
+            rule["fallback"],
+            rule["default"],
+        ))
+    return tuple(compiled)
+
+
+class MoyeeAttributeClassifier(models.AbstractModel):
+    _name = "moyee.attribute.classifier"
+    _description = "Moyee Product Attribute Classifier"
+
+    # ============================================================
+    # Compiled rules (once per registry)
+    # ============================================================
+    @api.model
+    @tools.ormcache()
+    def _moyee_get_compiled_rules(self):
+        return _moyee_compile_classifier_rules()
+
+    # ============================================================
+    # Classification
+    # ============================================================
+    @api.model
+    def _moyee_classify_values(self, variant_values=(), template_lines=(), display_name="", name="", use_defaults=True):
+        """
+        Classify one product from plain data in a single pass.
+
+        variant_values: iterable of (attribute name, value name)
+        template_lines: iterable of (attribute name, [value names])
+        Returns a dict with the grind, weight, bold and fruity labels; with
+        use_defaults=False, a dimension nothing matched is "" instead of its default.
+        """
+        rules = self._moyee_get_compiled_rules()
+        result = {}
+
+        def _match(value_rules, compact, value):
+            value = value.lower()
+            if compact:
+                value = value.replace(" ", "")
+            for label, regex in value_rules:
+                if regex.search(value):
+                    return label
+            return None
+
+        # 1. Variant attribute values, then 2. template attribute lines
+        for attr_name, value_names in [(a, (v,)) for a, v in variant_values] + list(template_lines):
+            if len(result) == len(rules):
+                break
+            attr_name = (attr_name or "").lower()
+            for dimension, attr_regex, value_rules, compact, _fallback, _default in rules:
+                if dimension in result or not attr_regex.search(attr_name):
+                    continue
+                for value in value_names:
+                    label = _match(value_rules, compact, value or "")
+                    if label:
+                        result[dimension] = label
+                        break
+
+        # 3. Name scan, then the dimension default
+        sources = {"display_name": display_name or name or "", "name": name or display_name or ""}
+        for dimension, _attr_regex, value_rules, compact, fallback, default in rules:
+            if dimension not in result:
+                result[dimension] = _match(value_rules, compact, sources[fallback]) or (default if use_defaults else "")
+        return result
+
+    @api.model
+    def moyee_classify_product(self, product, use_defaults=True):
+        """Return {'grind', 'weight', 'bold', 'fruity'} for a product.product record."""
+        if not product:
+            return {dimension: "other" if use_defaults else "" for dimension in MOYEE_CLASSIFIER_RULES}
+
+        variant_values = [
+            (av.attribute_id.name, av.name)
+            for av in product.product_template_attribute_value_ids
+        ]
+        template_lines = [
+            (line.attribute_id.name, [v.name for v in line.value_ids if v.name])
+            for line in product.product_tmpl_id.attribute_line_ids
+        ]
+        return self._moyee_classify_values(
+            variant_values=variant_values,
+            template_lines=template_lines,
+            display_name=product.display_name,
+            name=product.name,
+            use_defaults=use_defaults,
+        )
@@ -0,0 +1,139 @@
+# File: moyee_subscription_portal_manager/models/moyee_cache.py
+import functools
+import inspect
+import logging
+import threading
+
+from odoo import api, models
+from odoo.tools.lru import LRU
+
+_logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Dedicated memo caches
+# ------------------------------------------------------------
+# The registry only knows a fixed set of ormcache names, and clearing
+# 'default' drops every ormcache of every module in every worker.
+# The portal memos therefore live in their own per-process caches,
+# one per name below. Each name has a database sequence that is bumped
+# after a commit that invalidated it; workers compare it once per
+# transaction and drop their copy when it moved (the same scheme as
+# the registry cache signaling).
+# ============================================================
+MOYEE_CACHE_NAMES = ("catalog", "plans", "config", "subscription")
+MOYEE_CACHE_SIZE = 1024
+
+# Per process: (dbname, cache name) -> (registry, signaling sequence value, LRU).
+# A registry reload (module install/upgrade) starts from empty caches.
+_moyee_caches = {}
+_moyee_caches_lock = threading.Lock()
+
+
+def _moyee_cache_sequence(name):
+    return "moyee_cache_signaling_%s" % name
+
+
+def moyee_ormcache(cache_name, *arg_names):
+    """
+    Same contract as ``tools.ormcache(*arg_names)``, stored in the dedicated
+    cache ``cache_name`` and dropped with ``moyee.cache._moyee_clear(cache_name)``.
+    """
+    assert cache_name in MOYEE_CACHE_NAMES, cache_name
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            entries = self.env["moyee.cache"]._moyee_get_entries(cache_name)
+            if entries is None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (self._name, method.__name__) + tuple(bound.arguments[name] for name in arg_names)
+            try:
+                return entries[key]
+            except KeyError:
+                pass
+            value = entries[key] = method(self, *args, **kwargs)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+class MoyeeCache(models.AbstractModel):
+    _name = "moyee.cache"
+    _description = "Moyee Portal Memo Caches"
+
+    def init(self):
+        for name in MOYEE_CACHE_NAMES:
+            self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS %s" % _moyee_cache_sequence(name))
+
+    # ============================================================
+    # Per-transaction bookkeeping
+    # ============================================================
+    def _moyee_get_cursor_state(self):
+        """Signaling values read and caches invalidated by the current transaction."""
+        cr = self.env.cr
+        state = cr.cache.get("moyee_cache")
+        if state is None:
+            state = cr.cache["moyee_cache"] = {"sequences": {}, "dirty": set()}
+
+            def _reset():
+                cr.cache.pop("moyee_cache", None)
+
+            cr.postcommit.add(_reset)
+            cr.postrollback.add(_reset)
+        return state
+
+    # ============================================================
+    # Lookup / invalidation
+    # ============================================================
+    @api.model
+    def _moyee_get_entries(self, name):
+        """Return the LRU of cache `name` valid for this transaction, or None to bypass it."""
+        state = self._moyee_get_cursor_state()
+        if name in state["dirty"]:
+            # This transaction changed the cached data: never share what it computes
+            return None
+        sequence = state["sequences"].get(name)
+        if sequence is None:
+            self.env.cr.execute("SELECT last_value FROM %s" % _moyee_cache_sequence(name))
+            sequence = state["sequences"][name] = self.env.cr.fetchone()[0]
+
+        key = (self.env.cr.dbname, name)
+        registry = self.env.registry
+        with _moyee_caches_lock:
+            cached = _moyee_caches.get(key)
+            if cached is None or cached[0] is not registry or cached[1] != sequence:
+                cached = _moyee_caches[key] = (registry, sequence, LRU(MOYEE_CACHE_SIZE))
+        return cached[2]
+
+    @api.model
+    def _moyee_clear(self, *names):
+        """Drop caches `names` in this worker now, and in every worker once this transaction commits."""
+        dbname = self.env.cr.dbname
+        with _moyee_caches_lock:
+            for name in names:
+                _moyee_caches.pop((dbname, name), None)
+
+        state = self._moyee_get_cursor_state()
+        pending = set(names) - state["dirty"]
+        if not pending:
+            return
+        state["dirty"].update(pending)
+        registry = self.env.registry
+
+        def _signal():
+            with registry.cursor() as cr:
+                for name in sorted(pending):
+                    cr.execute("SELECT nextval(%s)", [_moyee_cache_sequence(name)])
+            with _moyee_caches_lock:
+                for name in pending:
+                    _moyee_caches.pop((dbname, name), None)
+            _logger.debug("Moyee: signaled cache invalidation for %s", ", ".join(sorted(pending)))
+
+        self.env.cr.postcommit.add(_signal)
@@ -0,0 +1,128 @@
+# File: moyee_subscription_portal_manager/models/moyee_shipping_rate_cache.py
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Rate cache settings
+# ------------------------------------------------------------
+# Orders that fall in the same bucket get the same carrier price:
+#   weight rounded up to MOYEE_RATE_WEIGHT_STEP kg,
+#   amount (without delivery) rounded down to MOYEE_RATE_AMOUNT_STEP,
+#   destination reduced to country, state and zip prefix.
+# The carrier's write_date is part of the key, so any change to the
+# carrier configuration makes older entries unreachable in every worker.
+# ============================================================
+MOYEE_RATE_CACHE_TTL = 15 * 60
+MOYEE_RATE_CACHE_SIZE = 2048
+MOYEE_RATE_WEIGHT_STEP = 0.25
+MOYEE_RATE_AMOUNT_STEP = 1.0
+MOYEE_RATE_ZIP_PREFIX = 4
+
+# Per process: key -> (expires_at, rate_shipment result)
+_moyee_rate_cache = OrderedDict()
+_moyee_rate_cache_lock = threading.Lock()
+_moyee_rate_cache_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+
+class MoyeeShippingRateCache(models.AbstractModel):
+    _name = "moyee.shipping.rate.cache"
+    _description = "Moyee Shipping Rate Cache"
+
+    # ============================================================
+    # Key
+    # ============================================================
+    @api.model
+    def _moyee_get_order_weight(self, order):
+        if hasattr(order, "_get_estimated_weight"):
+            return order._get_estimated_weight()
+        return sum(
+            (line.product_id.weight or 0.0) * (line.product_uom_qty or 0.0)
+            for line in order._moyee_get_sub_lines()
+        )
+
+    @api.model
+    def _moyee_get_order_amount(self, order):
+        if hasattr(order, "_compute_amount_total_without_delivery"):
+            return order._compute_amount_total_without_delivery()
+        return sum(order._moyee_get_sub_lines().mapped("price_total"))
+
+    @api.model
+    def _moyee_rate_key(self, order):
+        carrier = order.carrier_id
+        partner = order.partner_shipping_id or order.partner_id
+        zip_prefix = (partner.zip or "").replace(" ", "").upper()[:MOYEE_RATE_ZIP_PREFIX]
+        weight = self._moyee_get_order_weight(order)
+        amount = self._moyee_get_order_amount(order)
+        return (
+            self.env.cr.dbname,
+            carrier.id,
+            fields.Datetime.to_string(carrier.write_date),
+            partner.country_id.id,
+            partner.state_id.id,
+            zip_prefix,
+            math.ceil(round(weight / MOYEE_RATE_WEIGHT_STEP, 6)),
+            math.floor(round(amount / MOYEE_RATE_AMOUNT_STEP, 6)),
+            order.currency_id.id,
+        )
+
+    # ============================================================
+    # Cached rate_shipment
+    # ============================================================
+    @api.model
+    def moyee_rate_shipment(self, order):
+        """carrier_id.rate_shipment(order), memoized per bucket for MOYEE_RATE_CACHE_TTL seconds.
+
+        Only successful rates are cached; errors are always re-asked."""
+        order.ensure_one()
+        key = self._moyee_rate_key(order)
+        now = time.monotonic()
+
+        with _moyee_rate_cache_lock:
+            entry = _moyee_rate_cache.get(key)
+            if entry and entry[0] > now:
+                _moyee_rate_cache.move_to_end(key)
+                _moyee_rate_cache_stats["hits"] += 1
+                return dict(entry[1])
+            if entry:
+                del _moyee_rate_cache[key]
+                _moyee_rate_cache_stats["expired"] += 1
+            _moyee_rate_cache_stats["misses"] += 1
+
+        res = order.carrier_id.rate_shipment(order)
+        if res.get("success"):
+            with _moyee_rate_cache_lock:
+                _moyee_rate_cache[key] = (now + MOYEE_RATE_CACHE_TTL, dict(res))
+                while len(_moyee_rate_cache) > MOYEE_RATE_CACHE_SIZE:
+                    _moyee_rate_cache.popitem(last=False)
+                    _moyee_rate_cache_stats["evictions"] += 1
+        return res
+
+    # ============================================================
+    # Diagnostics (odoo shell:
+    #   env["moyee.shipping.rate.cache"].moyee_get_rate_cache_stats())
+    # ============================================================
+    @api.model
+    def moyee_get_rate_cache_stats(self):
+        """Hit/miss counters of this worker process."""
+        with _moyee_rate_cache_lock:
+            stats = dict(_moyee_rate_cache_stats, size=len(_moyee_rate_cache))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] / lookups) if lookups else 0.0
+        return stats
+
+    @api.model
+    def moyee_clear_rate_cache(self):
+        with _moyee_rate_cache_lock:
+            _moyee_rate_cache.clear()
+            for counter in _moyee_rate_cache_stats:
+                _moyee_rate_cache_stats[counter] = 0
+        _logger.info("Moyee: shipping rate cache cleared.")
+        return True
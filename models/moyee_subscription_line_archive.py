@@ -0,0 +1,81 @@
+# File: moyee_subscription_portal_manager/models/moyee_subscription_line_archive.py
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+from .res_config_settings import MOYEE_CONFIG_PARAM_PREFIX, _moyee_parse_config_value
+
+_logger = logging.getLogger(__name__)
+
+MOYEE_ARCHIVE_BATCH_SIZE = 500
+MOYEE_ARCHIVE_AFTER_DAYS = 90
+
+
+class MoyeeSubscriptionLineArchive(models.Model):
+    _name = "moyee.subscription.line.archive"
+    _description = "Moyee Archived Subscription Line"
+    _order = "removed_on desc, id desc"
+    _rec_name = "name"
+    # Compact history rows: archived_on replaces the create/write audit columns
+    _log_access = False
+
+    order_id = fields.Many2one("sale.order", string="Subscription", required=True, index=True, ondelete="cascade")
+    company_id = fields.Many2one("res.company", string="Company", index=True)
+    line_id = fields.Integer(string="Original Line ID", help="ID of the sale.order.line this row was moved from.")
+    product_id = fields.Many2one("product.product", string="Product", ondelete="set null")
+    name = fields.Text(string="Description")
+    product_uom_qty = fields.Float(string="Quantity", digits="Product Unit of Measure")
+    qty_delivered = fields.Float(string="Delivered", digits="Product Unit of Measure")
+    qty_invoiced = fields.Float(string="Invoiced", digits="Product Unit of Measure")
+    price_unit = fields.Float(string="Unit Price", digits="Product Price")
+    price_subtotal = fields.Monetary(string="Subtotal", currency_field="currency_id")
+    currency_id = fields.Many2one("res.currency", string="Currency")
+    removed_on = fields.Datetime(string="Removed On")
+    removed_by = fields.Many2one("res.users", string="Removed By", ondelete="set null")
+    remove_reason = fields.Text(string="Remove Reason")
+    # The invoice lines lose their sale_line_ids link when the line is deleted; keep it here
+    invoice_line_ids = fields.Many2many(
+        "account.move.line",
+        "moyee_sub_line_archive_invoice_line_rel",
+        "archive_id",
+        "move_line_id",
+        string="Invoice Lines",
+        readonly=True,
+    )
+    archived_on = fields.Datetime(string="Archived On", default=fields.Datetime.now)
+
+    # ============================================================
+    # Archival
+    # ============================================================
+    @api.model
+    def _moyee_get_archive_after_days(self):
+        value = self.env["ir.config_parameter"].sudo().get_param(MOYEE_CONFIG_PARAM_PREFIX + "archive_after_days")
+        return _moyee_parse_config_value(value, "int", MOYEE_ARCHIVE_AFTER_DAYS)
+
+    @api.model
+    def _moyee_archivable_line_domain(self, older_than):
+        domain = [
+            ("x_moyee_is_removed", "=", True),
+            ("x_moyee_removed_on", "<", older_than),
+            ("display_type", "=", False),
+            ("invoice_status", "in", ("invoiced", "no")),
+        ]
+        if "move_ids" in self.env["sale.order.line"]._fields:
+            # Lines with stock moves in progress wait for a later run
+            domain.append(("move_ids", "not any", [("state", "not in", ("done", "cancel"))]))
+        return domain
+
+    @api.model
+    def _cron_moyee_archive_removed_lines(self, batch_size=MOYEE_ARCHIVE_BATCH_SIZE):
+        """Move soft-removed, fully invoiced lines older than the configured age into the archive."""
+        older_than = fields.Datetime.now() - timedelta(days=self._moyee_get_archive_after_days())
+        lines = self.env["sale.order.line"].sudo().search(
+            self._moyee_archivable_line_domain(older_than), limit=batch_size, order="id",
+        )
+        archived = lines._moyee_archive_lines()
+        _logger.info("Moyee: archived %s removed subscription lines.", len(archived))
+        # A full batch that archived nothing would select the same lines again
+        if archived and len(lines) == batch_size:
+            self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_archive_removed_lines")._trigger()
+        return len(archived)
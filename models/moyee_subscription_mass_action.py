@@ -0,0 +1,76 @@
+# File: moyee_subscription_portal_manager/models/moyee_subscription_mass_action.py
+from ast import literal_eval
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+from .sale_order import MOYEE_MASS_ACTION_CHUNK_SIZE
+
+
+class MoyeeSubscriptionMassAction(models.TransientModel):
+    _name = "moyee.subscription.mass.action"
+    _description = "Moyee Mass Pause / Resume / Skip"
+
+    action = fields.Selection(
+        [("pause", "Pause"), ("resume", "Resume"), ("skip", "Skip Next Delivery")],
+        string="Action",
+        required=True,
+        default="skip",
+    )
+    scope = fields.Selection(
+        [("selected", "Selected Subscriptions"), ("domain", "Matching Filter")],
+        string="Apply To",
+        required=True,
+        default=lambda self: "selected" if self.env.context.get("active_ids") else "domain",
+    )
+    order_ids = fields.Many2many(
+        "sale.order",
+        string="Subscriptions",
+        default=lambda self: self.env.context.get("active_model") == "sale.order" and self.env.context.get("active_ids") or [],
+    )
+    domain = fields.Char(string="Filter", default="[]")
+    pause_until = fields.Date(string="Resume On", help="New next date of the paused subscriptions (left unchanged when empty).")
+    note = fields.Text(string="Note", help="Appended to the audit note logged on every subscription.")
+    chunk_size = fields.Integer(string="Batch Size", default=MOYEE_MASS_ACTION_CHUNK_SIZE)
+    subscription_count = fields.Integer(string="Subscriptions", compute="_compute_subscription_count", help="Matching subscriptions in a state the action applies to.")
+
+    def _moyee_get_domain(self):
+        self.ensure_one()
+        if self.scope == "selected":
+            return [("id", "in", self.order_ids.ids)]
+        try:
+            return literal_eval(self.domain or "[]")
+        except (ValueError, SyntaxError):
+            raise UserError(_("The filter is not a valid domain."))
+
+    @api.depends("action", "scope", "order_ids", "domain")
+    def _compute_subscription_count(self):
+        SaleOrder = self.env["sale.order"]
+        for wizard in self:
+            try:
+                domain = wizard._moyee_get_domain()
+            except UserError:
+                wizard.subscription_count = 0
+                continue
+            wizard.subscription_count = SaleOrder.search_count(SaleOrder._moyee_mass_action_domain(domain, wizard.action))
+
+    def action_apply(self):
+        self.ensure_one()
+        self.env["sale.order.line"]._moyee_check_manager_rights()
+        if self.pause_until and self.pause_until < fields.Date.today():
+            raise UserError(_("The resume date cannot be in the past."))
+
+        job = self.env["sale.order"]._moyee_mass_subscription_action(
+            self._moyee_get_domain(),
+            self.action,
+            pause_until=self.pause_until if self.action == "pause" else None,
+            note=self.note,
+            chunk_size=max(self.chunk_size, 1),
+        )
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": "moyee.subscription.mass.job",
+            "res_id": job.id,
+            "view_mode": "form",
+            "target": "current",
+        }
@@ -0,0 +1,167 @@
+# File: moyee_subscription_portal_manager/models/moyee_subscription_mass_job.py
+import logging
+import time
+from ast import literal_eval
+
+from odoo import Command, _, api, fields, models
+
+from .sale_order import MOYEE_MASS_ACTION_CHUNK_SIZE
+
+_logger = logging.getLogger(__name__)
+
+# Seconds of work per cron run; a longer job re-triggers the cron and continues
+MOYEE_MASS_JOB_TIME_BUDGET = 120
+
+
+class MoyeeSubscriptionMassJob(models.Model):
+    _name = "moyee.subscription.mass.job"
+    _description = "Moyee Queued Mass Subscription Action"
+    _order = "id desc"
+
+    name = fields.Char(string="Name", required=True, readonly=True)
+    action = fields.Selection(
+        [("pause", "Pause"), ("resume", "Resume"), ("skip", "Skip Next Delivery")],
+        string="Action",
+        required=True,
+        readonly=True,
+    )
+    domain = fields.Text(string="Filter", required=True, readonly=True, help="Subscriptions to process, state gate included.")
+    pause_until = fields.Date(string="Resume On", readonly=True)
+    note = fields.Text(string="Note", readonly=True)
+    chunk_size = fields.Integer(string="Batch Size", default=MOYEE_MASS_ACTION_CHUNK_SIZE, readonly=True)
+    author_id = fields.Many2one("res.partner", string="Author", readonly=True, help="Author of the audit notes.")
+    state = fields.Selection(
+        [("queued", "Queued"), ("running", "Running"), ("done", "Done")],
+        string="Status",
+        default="queued",
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    subscription_count = fields.Integer(string="Subscriptions", readonly=True)
+    processed_count = fields.Integer(string="Processed", readonly=True)
+    updated_count = fields.Integer(string="Updated", readonly=True)
+    failed_count = fields.Integer(string="Failed", readonly=True)
+    failed_order_ids = fields.Many2many(
+        "sale.order",
+        "moyee_subscription_mass_job_failed_order_rel",
+        "job_id",
+        "order_id",
+        string="Failed Subscriptions",
+        readonly=True,
+        help="Subscriptions the action could not be applied to; they were left unchanged.",
+    )
+    # Keyset cursor over the matching orders, bounded by the last id seen at submission
+    last_order_id = fields.Integer(string="Last Processed Order ID", readonly=True)
+    max_order_id = fields.Integer(string="Last Order ID", readonly=True)
+    started_on = fields.Datetime(string="Started On", readonly=True)
+    finished_on = fields.Datetime(string="Finished On", readonly=True)
+
+    # ============================================================
+    # Queue
+    # ============================================================
+    @api.model
+    def _moyee_submit(self, domain, action, pause_until=None, note=None, chunk_size=MOYEE_MASS_ACTION_CHUNK_SIZE):
+        """Queue `action` on the sale orders matching `domain` and wake up the processing cron."""
+        SaleOrder = self.env["sale.order"].sudo()
+        last_order = SaleOrder.search(domain, order="id desc", limit=1)
+        action_label = dict(self._fields["action"]._description_selection(self.env))[action]
+        job = self.sudo().create({
+            "name": _("%(action)s – %(date)s") % {"action": action_label, "date": fields.Datetime.to_string(fields.Datetime.now())},
+            "action": action,
+            "domain": repr(list(domain)),
+            "pause_until": pause_until,
+            "note": note,
+            "chunk_size": max(chunk_size or MOYEE_MASS_ACTION_CHUNK_SIZE, 1),
+            "author_id": self.env.user.partner_id.id,
+            "subscription_count": SaleOrder.search_count(domain),
+            "max_order_id": last_order.id,
+        })
+        self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_process_mass_jobs")._trigger()
+        return job
+
+    # ============================================================
+    # Processing
+    # ============================================================
+    @api.model
+    def _cron_moyee_process_mass_jobs(self, time_budget=MOYEE_MASS_JOB_TIME_BUDGET):
+        """Process queued jobs oldest first, one committed batch at a time, within `time_budget` seconds."""
+        auto_commit = not self.env.registry.in_test_mode()
+        deadline = time.monotonic() + time_budget
+        for job in self.search([("state", "in", ("queued", "running"))], order="id"):
+            while job.state != "done":
+                if time.monotonic() > deadline:
+                    self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_process_mass_jobs")._trigger()
+                    return
+                job._moyee_process_batch(commit=auto_commit)
+
+    def _moyee_process_batch(self, commit=True):
+        """
+        Apply the action to the next `chunk_size` matching subscriptions: grouped writes
+        and one audit note per updated order. A failing batch is rolled back to its
+        savepoint and retried one order at a time, so only the orders that fail
+        themselves are skipped; they are listed on the job. Progress is stored on the job.
+        """
+        self.ensure_one()
+        SaleOrder = self.env["sale.order"].sudo()
+        now = fields.Datetime.now()
+        orders = SaleOrder.search(
+            literal_eval(self.domain) + [("id", ">", self.last_order_id), ("id", "<=", self.max_order_id)],
+            order="id",
+            limit=self.chunk_size,
+        )
+        if not orders:
+            self.write({"state": "done", "finished_on": now, "started_on": self.started_on or now})
+            if commit:
+                self.env.cr.commit()
+            _logger.info(
+                "Moyee mass %s job %s done: %s/%s subscriptions, %s updated, %s failed.",
+                self.action, self.id, self.processed_count, self.subscription_count, self.updated_count, self.failed_count,
+            )
+            return
+
+        vals = {
+            "state": "running",
+            "started_on": self.started_on or now,
+            "last_order_id": orders[-1].id,
+            "processed_count": self.processed_count + len(orders),
+        }
+        failed = SaleOrder.browse()
+        try:
+            with self.env.cr.savepoint():
+                updated = self._moyee_apply_to_orders(orders)
+        except Exception:
+            _logger.warning(
+                "Moyee mass %s job %s: batch failed (orders %s), retrying one order at a time.",
+                self.action, self.id, orders.ids, exc_info=True,
+            )
+            updated = 0
+            for order in orders:
+                try:
+                    with self.env.cr.savepoint():
+                        updated += self._moyee_apply_to_orders(order)
+                except Exception:
+                    _logger.exception("Moyee mass %s job %s: failed on %s.", self.action, self.id, order.name)
+                    failed |= order
+        vals["updated_count"] = self.updated_count + updated
+        if failed:
+            vals["failed_count"] = self.failed_count + len(failed)
+            vals["failed_order_ids"] = [Command.link(order.id) for order in failed]
+        self.write(vals)
+        if commit:
+            self.env.cr.commit()
+        _logger.info(
+            "Moyee mass %s job %s: %s/%s subscriptions, %s updated, %s failed.",
+            self.action, self.id, self.processed_count, self.subscription_count, self.updated_count, self.failed_count,
+        )
+        # Keep the record cache bounded over thousands of subscriptions
+        self.env.invalidate_all()
+
+    def _moyee_apply_to_orders(self, orders):
+        """Apply the job's action to `orders` and log the audit notes; returns the number of updated orders."""
+        bodies = orders._moyee_mass_apply(self.action, pause_until=self.pause_until)
+        if self.note:
+            bodies = {order_id: "%s\n%s" % (body, self.note) for order_id, body in bodies.items()}
+        # Orders skipped by the transition get no note
+        orders.browse(list(bodies))._message_log_batch(bodies=bodies, author_id=self.author_id.id or None)
+        return len(bodies)
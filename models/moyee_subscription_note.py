@@ -0,0 +1,78 @@
+# File: moyee_subscription_portal_manager/models/moyee_subscription_note.py
+import logging
+from datetime import timedelta
+
+from markupsafe import Markup
+
+from odoo import api, fields, models
+from odoo.tools import plaintext2html
+
+_logger = logging.getLogger(__name__)
+
+# Notes queued within this window are merged into one chatter message per order
+MOYEE_NOTE_FLUSH_DELAY = 60
+MOYEE_NOTE_FLUSH_BATCH_SIZE = 5000
+
+
+class MoyeeSubscriptionNote(models.Model):
+    _name = "moyee.subscription.note"
+    _description = "Moyee Queued Subscription Note"
+    _order = "id"
+    # Short-lived queue rows: queued_on replaces the create/write audit columns
+    _log_access = False
+
+    order_id = fields.Many2one("sale.order", string="Subscription", required=True, index=True, ondelete="cascade")
+    author_id = fields.Many2one("res.partner", string="Author", ondelete="set null")
+    # Stored as HTML: plain text is escaped once at enqueue time, markup is kept as is
+    body = fields.Html(string="Note", required=True, sanitize=False)
+    queued_on = fields.Datetime(string="Queued On", default=fields.Datetime.now)
+
+    # ============================================================
+    # Queue
+    # ============================================================
+    @api.model
+    def _moyee_enqueue(self, orders, body, author_partner=None):
+        """
+        Queue `body` as a chatter note on every order; the flush cron posts it shortly
+        after commit. A plain string is escaped as text, a ``Markup`` body is kept as HTML.
+        """
+        if not orders:
+            return self
+        if not isinstance(body, Markup):
+            body = plaintext2html(body)
+        author_id = author_partner.id if author_partner else False
+        notes = self.sudo().create([
+            {"order_id": order_id, "author_id": author_id, "body": body} for order_id in orders.ids
+        ])
+        # Trigger the flush once per transaction, after the merge window
+        if not self.env.cr.precommit.data.get("moyee.note_flush_triggered"):
+            self.env.cr.precommit.data["moyee.note_flush_triggered"] = True
+            cron = self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_flush_subscription_notes", raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger(fields.Datetime.now() + timedelta(seconds=MOYEE_NOTE_FLUSH_DELAY))
+        return notes
+
+    # ============================================================
+    # Flush
+    # ============================================================
+    @api.model
+    def _cron_moyee_flush_subscription_notes(self, batch_size=MOYEE_NOTE_FLUSH_BATCH_SIZE):
+        """Post queued notes to the chatter: one message per (order, author), in queue order."""
+        notes = self.sudo().search([], limit=batch_size)
+        if not notes:
+            return 0
+
+        SaleOrder = self.env["sale.order"].sudo()
+        bodies_by_author = {}
+        for (order, author), order_notes in notes.grouped(lambda n: (n.order_id, n.author_id)).items():
+            merged = Markup("<br/>").join(Markup(body) for body in order_notes.mapped("body"))
+            bodies_by_author.setdefault(author, {})[order.id] = merged
+
+        for author, bodies in bodies_by_author.items():
+            SaleOrder.browse(list(bodies))._message_log_batch(bodies=bodies, author_id=author.id or None)
+
+        notes.unlink()
+        _logger.info("Moyee: flushed %s queued subscription notes.", len(notes))
+        if len(notes) == batch_size:
+            self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_flush_subscription_notes")._trigger()
+        return len(notes)
@@ -0,0 +1,48 @@
+# File: moyee_subscription_portal_manager/models/product_attribute.py
+from odoo import api, models
+
+
+# ============================================================
+# Variant grind/weight are stored computes over attribute names:
+# renaming an attribute or value, or editing a template's attribute
+# lines, can move variants in the (template, grind, weight) index.
+# ============================================================
+class ProductAttribute(models.Model):
+    _inherit = "product.attribute"
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "name" in vals:
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
+
+
+class ProductAttributeValue(models.Model):
+    _inherit = "product.attribute.value"
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"name", "attribute_id"}.intersection(vals):
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
+
+
+class ProductTemplateAttributeLine(models.Model):
+    _inherit = "product.template.attribute.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env["moyee.cache"]._moyee_clear("catalog")
+        return lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"attribute_id", "value_ids", "active"}.intersection(vals):
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
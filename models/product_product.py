@@ -0,0 +1,237 @@
+# File: moyee_subscription_portal_manager/models/product_product.py
+import logging
+
+from odoo import api, fields, models
+
+from .moyee_cache import moyee_ormcache
+
+_logger = logging.getLogger(__name__)
+
+
+MOYEE_GRIND_SELECTION = [
+    ("whole", "Whole beans"),
+    ("filter", "Filter grind"),
+    ("espresso", "Espresso grind"),
+    ("capsules", "Capsules"),
+]
+MOYEE_WEIGHT_SELECTION = [
+    ("1kg", "1 kg"),
+    ("250g", "250g"),
+    ("25caps", "25 Capsules"),
+]
+MOYEE_BOLD_SELECTION = [
+    ("light", "Light"),
+    ("medium", "Medium"),
+    ("bold", "Bold"),
+    ("other", "Other"),
+]
+MOYEE_FRUITY_SELECTION = [
+    ("full", "Full"),
+    ("fruity", "Fruity"),
+    ("other", "Other"),
+]
+
+
+# Writes on these fields can move a variant in the (template, grind, weight) index
+MOYEE_VARIANT_INDEX_FIELDS = {
+    "product_tmpl_id",
+    "active",
+    "sale_ok",
+    "product_template_attribute_value_ids",
+    "x_moyee_grind",
+    "x_moyee_weight",
+}
+
+# Writes on these fields can change the portal "Add product" catalog
+MOYEE_PORTAL_CATALOG_FIELDS = MOYEE_VARIANT_INDEX_FIELDS | {
+    "name",
+    "default_code",
+    "type",
+    "detailed_type",
+    "is_delivery",
+    "company_id",
+    "website_id",
+    "tag_ids",
+    "subscription_ok",
+    "recurring_invoice",
+    "list_price",
+    "lst_price",
+    "x_moyee_portal_visible",
+}
+
+# Service / maintenance / accessory / delivery / discount products never show in the portal
+MOYEE_PORTAL_EXCLUDE_KEYWORDS = (
+    "onderhoud", "service", "maintenance", "installatie", "repair", "reparatie",
+    "schoonmaak", "cleaning", "reiniging", "optie", "support",
+    "delivery", "shipping", "bezorg", "levering", "verzend", "verzending",
+    "verzendkosten", "transport", "postnl", "dhl", "ups",
+    "discount", "promo", "coupon",
+)
+
+
+class ProductProduct(models.Model):
+    _inherit = "product.product"
+
+    # ============================================================
+    # Stored portal classification (grind / weight / bold / fruity)
+    # ============================================================
+    x_moyee_grind = fields.Selection(
+        MOYEE_GRIND_SELECTION,
+        string="Portal Grind",
+        compute="_compute_moyee_classification",
+        store=True,
+        index=True,
+        help="Grind detected from the variant attributes, template attribute lines or name.",
+    )
+    x_moyee_weight = fields.Selection(
+        MOYEE_WEIGHT_SELECTION,
+        string="Portal Pack Size",
+        compute="_compute_moyee_classification",
+        store=True,
+        index=True,
+    )
+    x_moyee_bold = fields.Selection(
+        MOYEE_BOLD_SELECTION,
+        string="Portal Boldness",
+        compute="_compute_moyee_classification",
+        store=True,
+        index=True,
+    )
+    x_moyee_fruity = fields.Selection(
+        MOYEE_FRUITY_SELECTION,
+        string="Portal Full or Fruity",
+        compute="_compute_moyee_classification",
+        store=True,
+        index=True,
+    )
+
+    x_moyee_portal_visible = fields.Boolean(
+        string="Visible in Subscription Portal",
+        compute="_compute_moyee_portal_visible",
+        store=True,
+        index=True,
+        help="Physical, non-delivery product whose name/code matches none of the portal exclusion keywords.",
+    )
+
+    @api.depends(
+        "name",
+        "default_code",
+        "product_template_attribute_value_ids.name",
+        "product_template_attribute_value_ids.attribute_id.name",
+        "product_tmpl_id.attribute_line_ids.attribute_id.name",
+        "product_tmpl_id.attribute_line_ids.value_ids.name",
+    )
+    def _compute_moyee_classification(self):
+        classifier = self.env["moyee.attribute.classifier"]
+        for product in self:
+            res = classifier.moyee_classify_product(product)
+            product.x_moyee_grind = res["grind"]
+            product.x_moyee_weight = res["weight"]
+            product.x_moyee_bold = res["bold"]
+            product.x_moyee_fruity = res["fruity"]
+
+    def _moyee_portal_visible_depends(self):
+        return [fname for fname in ("name", "default_code", "type", "detailed_type", "is_delivery") if fname in self._fields]
+
+    @api.depends(lambda self: self._moyee_portal_visible_depends())
+    def _compute_moyee_portal_visible(self):
+        type_field = "detailed_type" if "detailed_type" in self._fields else "type"
+        for product in self:
+            p_name = (product.name or "").lower()
+            p_code = (product.default_code or "").lower()
+            product.x_moyee_portal_visible = bool(
+                product[type_field] in ("consu", "product")
+                and not getattr(product, "is_delivery", False)
+                and not any(kw in p_name or kw in p_code for kw in MOYEE_PORTAL_EXCLUDE_KEYWORDS)
+            )
+
+    # ============================================================
+    # Portal "Add product" catalog (once per company / website)
+    # ============================================================
+    @api.model
+    @moyee_ormcache("catalog", "company_id", "website_id")
+    def _moyee_get_portal_catalog_ids(self, company_id, website_id):
+        """Return the ordered tuple of product ids offered by the portal "Add product" popup."""
+        Product = self.sudo()
+        Template = self.env["product.template"].sudo()
+
+        domain = [("sale_ok", "=", True), ("x_moyee_portal_visible", "=", True)]
+        if "subscription_ok" in Template._fields:
+            domain.append(("product_tmpl_id.subscription_ok", "=", True))
+        elif "recurring_invoice" in Template._fields:
+            domain.append(("product_tmpl_id.recurring_invoice", "=", True))
+
+        if "company_id" in Product._fields and company_id:
+            domain.append(("company_id", "in", [False, company_id]))
+        if "website_id" in Product._fields and website_id:
+            domain.append(("website_id", "in", [False, website_id]))
+
+        # Filter by 'Subscription' tag if tag_ids field exists on product.template
+        if "tag_ids" in Template._fields:
+            domain.append(("product_tmpl_id.tag_ids.name", "ilike", "Subscription"))
+
+        return tuple(Product.search(domain, order="name, id", limit=200).ids)
+
+    # ============================================================
+    # (template, grind, weight) -> variant index (once per registry)
+    # ============================================================
+    @api.model
+    @moyee_ormcache("catalog")
+    def _moyee_get_variant_index(self):
+        """
+        Build the portal variant index over all saleable variants.
+        Returns (index, reverse, default_weight):
+          index:          {(tmpl_id, grind, weight): variant_id}
+          reverse:        {variant_id: (tmpl_id, grind, weight)}
+          default_weight: {tmpl_id: weight of the first saleable variant}
+        The dicts are shared by every caller and must not be mutated.
+        """
+        rows = self.sudo().with_context(active_test=True).search_read(
+            [("sale_ok", "=", True)],
+            ["product_tmpl_id", "x_moyee_grind", "x_moyee_weight"],
+        )
+        index, reverse, default_weight = {}, {}, {}
+        for row in rows:
+            tmpl_id = row["product_tmpl_id"][0] if row["product_tmpl_id"] else False
+            key = (tmpl_id, row["x_moyee_grind"], row["x_moyee_weight"])
+            # Keep the first variant in default order, like the former search loop
+            index.setdefault(key, row["id"])
+            reverse[row["id"]] = key
+            default_weight.setdefault(tmpl_id, row["x_moyee_weight"])
+        return index, reverse, default_weight
+
+    @api.model
+    def _moyee_find_variant(self, tmpl_id, grind, weight=None):
+        """Return the saleable variant of `tmpl_id` with this grind/weight (or an empty recordset)."""
+        index, _reverse, default_weight = self._moyee_get_variant_index()
+        weight = weight or default_weight.get(tmpl_id)
+        variant_id = index.get((tmpl_id, grind, weight))
+        return self.browse(variant_id) if variant_id else self.browse()
+
+    def _moyee_get_variant_key(self):
+        """Return (tmpl_id, grind, weight) for this variant, from the index when possible."""
+        self.ensure_one()
+        key = self._moyee_get_variant_index()[1].get(self.id)
+        if key:
+            return key
+        return (self.product_tmpl_id.id, self.x_moyee_grind, self.x_moyee_weight)
+
+    # ============================================================
+    # Keep the variant index / catalog in sync (dedicated "catalog" cache)
+    # ============================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        self.env["moyee.cache"]._moyee_clear("catalog")
+        return products
+
+    def write(self, vals):
+        res = super().write(vals)
+        if MOYEE_PORTAL_CATALOG_FIELDS.intersection(vals):
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
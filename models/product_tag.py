@@ -0,0 +1,33 @@
+# File: moyee_subscription_portal_manager/models/product_tag.py
+from odoo import api, models
+
+
+MOYEE_TAG_CATALOG_FIELDS = {"name", "product_template_ids", "product_product_ids"}
+
+
+class ProductTag(models.Model):
+    _inherit = "product.tag"
+
+    # ============================================================
+    # The portal catalog filters on the 'Subscription' tag name
+    # ============================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        tags = super().create(vals_list)
+        # A new tag only matters once it is put on products
+        if any({"product_template_ids", "product_product_ids"}.intersection(vals) for vals in vals_list):
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return tags
+
+    def write(self, vals):
+        res = super().write(vals)
+        if MOYEE_TAG_CATALOG_FIELDS.intersection(vals):
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
+
+    def unlink(self):
+        used = "product_template_ids" not in self._fields or bool(self.product_template_ids)
+        res = super().unlink()
+        if used:
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
@@ -0,0 +1,22 @@
+# File: moyee_subscription_portal_manager/models/product_template.py
+from odoo import models
+
+from .product_product import MOYEE_PORTAL_CATALOG_FIELDS
+
+
+class ProductTemplate(models.Model):
+    _inherit = "product.template"
+
+    # ============================================================
+    # Keep the portal variant index / catalog in sync with template changes
+    # ============================================================
+    def write(self, vals):
+        res = super().write(vals)
+        if MOYEE_PORTAL_CATALOG_FIELDS.union({"attribute_line_ids"}).intersection(vals):
+            self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["moyee.cache"]._moyee_clear("catalog")
+        return res
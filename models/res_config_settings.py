@@ -1,5 +1,55 @@
 # File: moyee_subscription_portal_manager/models/res_config_settings.py
-from odoo import fields, models
+from odoo import api, fields, models
+
+from .moyee_cache import moyee_ormcache
+
+MOYEE_CONFIG_PARAM_PREFIX = "moyee_subscription_portal_manager."
+MOYEE_DEFAULT_PAGE_SIZE = 10
+MOYEE_MAX_PAGE_SIZE = 100
+
+# Portal config bundle: key -> (ir.config_parameter suffix, type, default)
+MOYEE_PORTAL_CONFIG_PARAMS = {
+    "primary_color": ("primary_color", "char", "#E91E8C"),
+    "secondary_color": ("secondary_color", "char", "#FCE4F3"),
+    "font_family": ("font_family", "char", "system-ui"),
+    "show_subscription": ("show_subscription", "bool", True),
+    "show_overview": ("show_overview", "bool", True),
+    "show_orders": ("show_orders", "bool", True),
+    "show_invoices": ("show_invoices", "bool", True),
+    "show_faq": ("show_faq", "bool", True),
+    "show_inspire": ("show_inspire", "bool", True),
+    "show_taf": ("show_taf", "bool", True),
+    "show_brew_guides": ("show_brew_guides", "bool", True),
+    "brew_guides_all_url": ("brew_guides_all_url", "char", "/shop"),
+    "show_sidebar_profile": ("show_sidebar_profile", "bool", True),
+    "show_sidebar_upsell": ("show_sidebar_upsell", "bool", True),
+    "show_sidebar_support": ("show_sidebar_support", "bool", True),
+    "upsell_cta_url": ("upsell_cta_url", "char", "/shop"),
+    "support_email": ("support_email", "char", "hello@moyeecoffee.com"),
+    "inspire_eyebrow": ("inspire_eyebrow", "char", "Do you know where your coffee comes from?"),
+    "inspire_title": ("inspire_title", "char", "Your coffee comes from Ethiopia"),
+    "inspire_body": ("inspire_body", "char", "Your Moyee coffee comes from small farmers in the Kaffa forest in Ethiopia. They receive a fair price — thanks to you."),
+    "inspire_btn1_text": ("inspire_btn1_text", "char", "Read the story"),
+    "inspire_btn1_url": ("inspire_btn1_url", "char", "/radical-impact-coffee"),
+    "inspire_btn2_text": ("inspire_btn2_text", "char", "Browse our coffee"),
+    "inspire_btn2_url": ("inspire_btn2_url", "char", "/shop"),
+    "page_size": ("portal_page_size", "int", MOYEE_DEFAULT_PAGE_SIZE),
+}
+# res.company fields that are part of the bundle
+MOYEE_PORTAL_CONFIG_COMPANY_FIELDS = ("name", "moyee_enable_user_filter")
+
+
+def _moyee_parse_config_value(value, kind, default):
+    if value in (None, False, ""):
+        return default
+    if kind == "bool":
+        return str(value).lower() in ("true", "1", "yes")
+    if kind == "int":
+        try:
+            return max(int(value), 1)
+        except (TypeError, ValueError):
+            return default
+    return value
 
 
 class ResCompany(models.Model):
@@ -20,6 +70,12 @@ class ResCompany(models.Model):
         help="Select subscription customers/partners who will see the new Moyee Portal Home page (/my/home). Unselected users will see Odoo's default portal page.",
     )
 
+    def write(self, vals):
+        res = super().write(vals)
+        if any(f in vals for f in MOYEE_PORTAL_CONFIG_COMPANY_FIELDS):
+            self.env["moyee.cache"]._moyee_clear("config")
+        return res
+
 
 class ResConfigSettings(models.TransientModel):
     _inherit = "res.config.settings"
@@ -120,6 +176,21 @@ class ResConfigSettings(models.TransientModel):
         config_parameter="moyee_subscription_portal_manager.brew_guides_all_url",
         default="/shop",
     )
+    moyee_archive_after_days = fields.Integer(
+        string="Archive Removed Lines After (days)",
+        config_parameter="moyee_subscription_portal_manager.archive_after_days",
+        default=90,
+    )
+    moyee_portal_page_size = fields.Integer(
+        string="Orders/Invoices Page Size",
+        config_parameter="moyee_subscription_portal_manager.portal_page_size",
+        default=10,
+    )
+    moyee_state_strategy_info = fields.Text(
+        string="Subscription State Strategy",
+        compute="_compute_moyee_state_strategy_info",
+        help="How pause, resume and close are performed on this database (resolved once per registry).",
+    )
     moyee_support_email = fields.Char(
         string="Support Email",
         config_parameter="moyee_subscription_portal_manager.support_email",
@@ -163,6 +234,43 @@ class ResConfigSettings(models.TransientModel):
         default="/shop",
     )
 
+    # ============================================================
+    # Portal configuration bundle (dedicated "config" cache)
+    # ============================================================
+    @api.model
+    @moyee_ormcache("config", "company_id", "website_id")
+    def _moyee_get_portal_config_bundle(self, company_id=False, website_id=False):
+        """
+        Typed portal configuration for one company/website, read in a single query.
+        Cleared by writes to moyee_subscription_portal_manager.* config parameters and company edits.
+        Callers get a shared dict and must copy it before changing it.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        params = {MOYEE_CONFIG_PARAM_PREFIX + suffix for suffix, _kind, _default in MOYEE_PORTAL_CONFIG_PARAMS.values()}
+        stored = {param.key: param.value for param in ICP.search([("key", "in", list(params))])}
+
+        config = {
+            key: _moyee_parse_config_value(stored.get(MOYEE_CONFIG_PARAM_PREFIX + suffix), kind, default)
+            for key, (suffix, kind, default) in MOYEE_PORTAL_CONFIG_PARAMS.items()
+        }
+
+        config["page_size"] = min(config["page_size"], MOYEE_MAX_PAGE_SIZE)
+
+        company = self.env["res.company"].sudo().browse(company_id).exists() if company_id else False
+        config["redesign_company"] = not company or "Moyee Coffee" in (company.name or "")
+        config["enable_user_filter"] = bool(company and "moyee_enable_user_filter" in company._fields and company.moyee_enable_user_filter)
+        return config
+
+    def _compute_moyee_state_strategy_info(self):
+        info = self.env["sale.order"].sudo()._moyee_get_state_strategy_report()
+        for settings in self:
+            settings.moyee_state_strategy_info = info
+
+    def action_moyee_reset_state_strategy(self):
+        """Forget the resolved pause/resume/close strategy (e.g. after renaming subscription stages)."""
+        self.env["moyee.cache"]._moyee_clear("subscription")
+        return True
+
     def get_values(self):
         res = super(ResConfigSettings, self).get_values()
         ICP = self.env["ir.config_parameter"].sudo()
@@ -2,13 +2,113 @@
 import logging
 import re
 import json
+import time
+from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 from odoo import _, api, fields, models
 from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.tools import split_every
+from odoo.tools.sql import column_exists, create_column, create_index
+from .moyee_cache import moyee_ormcache
+from .sale_order_line import MOYEE_DELIVERY_LINE_ROLES
 
 _logger = logging.getLogger(__name__)
 
 
+# Fields that mark an order as a subscription, depending on the Odoo build
+MOYEE_SUBSCRIPTION_MARKER_FIELDS = (
+    "is_subscription",
+    "plan_id",
+    "subscription_state",
+    "subscription_status",
+    "recurring_plan_id",
+    "subscription_pricing_id",
+    "subscription_plan_id",
+    "recurring_pricing_id",
+)
+
+# Portal batch API: operation -> (sale.order method, required arguments, optional arguments)
+MOYEE_PORTAL_BATCH_OPERATIONS = {
+    "add_product": ("moyee_portal_add_product", ("product_id",), ("qty", "mode")),
+    "remove": ("_moyee_portal_remove_line", ("line_id",), ("reason",)),
+    "edit_product": ("moyee_portal_edit_line_product", ("line_id", "template_id", "grind", "weight"), ("qty",)),
+    "update_qty": ("moyee_portal_update_line_qty", ("line_id", "qty"), ()),
+    "change_interval": ("moyee_portal_change_interval", ("plan_id",), ()),
+    "push_delivery_date": ("moyee_portal_push_next_date", ("next_date",), ()),
+}
+MOYEE_PORTAL_BATCH_MAX_OPERATIONS = 50
+
+# Lines that may end up on an invoice; x_moyee_is_active_line stands for
+# "not a section/note, not soft-removed and quantity > 0" and is backed by a
+# partial index on (order_id) WHERE x_moyee_is_active_line.
+MOYEE_ACTIVE_LINE_DOMAIN = [("x_moyee_is_active_line", "=", True)]
+MOYEE_INVOICEABLE_LINE_DOMAIN = MOYEE_ACTIVE_LINE_DOMAIN
+# Active lines plus the section/note lines that structure them
+MOYEE_VISIBLE_LINE_DOMAIN = ["|", ("display_type", "!=", False)] + MOYEE_ACTIVE_LINE_DOMAIN
+MOYEE_INVOICE_CHUNK_SIZE = 100
+# Next invoice / delivery date field, first one present in the build
+MOYEE_NEXT_DATE_FIELDS = ("recurring_next_date", "next_invoice_date", "next_delivery_date", "x_next_delivery_date")
+
+# Backend mass actions (moyee.subscription.mass.action wizard)
+MOYEE_MASS_ACTIONS = ("pause", "resume", "skip")
+MOYEE_MASS_ACTION_CHUNK_SIZE = 1000
+
+# Candidate targets per subscription state transition, see _moyee_get_state_strategy
+MOYEE_STATE_TRANSITIONS = {
+    "pause": {
+        "state_keys": ("4_paused", "paused", "pause", "suspended", "suspend", "hold"),
+        "methods": ("action_pause", "action_suspend", "action_subscription_pause", "action_set_to_pause"),
+        "status_keys": ("4_paused", "paused", "pause", "suspended", "suspend", "hold"),
+        "stage_names": ("pause", "suspend", "hold"),
+        # Transitions (or extra states, see MOYEE_STATE_SOURCES) whose state an order must
+        # be in: running subscriptions and those up for renewal pause
+        "from": ("resume", "renewal"),
+    },
+    "resume": {
+        "state_keys": ("3_progress", "in_progress", "progress", "running", "active", "open"),
+        "methods": ("action_resume", "action_reactivate", "action_subscription_resume", "action_set_to_progress"),
+        "status_keys": ("3_progress", "in_progress", "progress", "running", "active", "open"),
+        "stage_names": ("progress", "in progress", "running", "active"),
+        "from": ("pause",),
+    },
+    "close": {
+        "state_keys": ("6_churn", "5_churn", "4_closed", "closed", "cancel", "churned", "churn", "close"),
+        # sale.order.action_cancel is the last resort of _moyee_set_subscription_closed_state
+        "methods": ("action_close", "action_subscription_close", "action_set_to_close"),
+        "status_keys": ("closed", "cancel", "churned", "churn", "close"),
+        "stage_names": ("closed", "cancel", "churn"),
+        "from": ("resume", "renewal", "pause"),
+    },
+}
+
+# Source states of the transitions above: their target states plus states no transition leads to
+MOYEE_STATE_SOURCES = dict(
+    MOYEE_STATE_TRANSITIONS,
+    renewal={
+        "state_keys": ("2_renewal", "to_renew", "renewal", "renew"),
+        "status_keys": ("2_renewal", "to_renew", "renewal", "renew"),
+        "stage_names": ("renew",),
+    },
+)
+
+
+def _moyee_pick_selection_key(model, field_name, candidates):
+    """First selection key of model.field_name equal to, then containing, one of the candidates."""
+    keys = [key for key, _label in model._fields[field_name]._description_selection(model.env)]
+    for candidate in candidates:
+        if candidate in keys:
+            return candidate
+    for candidate in candidates:
+        for key in keys:
+            if candidate in str(key).lower():
+                return key
+    return None
+
+# Subscription amount fields (untaxed, tax, total) set by _compute_amounts, if present in the build
+MOYEE_RECURRING_AMOUNT_FIELDS = ("recurring_amount_untaxed", "recurring_amount_tax", "recurring_amount_total")
+MOYEE_NON_RECURRING_AMOUNT_FIELDS = ("non_recurring_amount_untaxed", "non_recurring_amount_tax", "non_recurring_amount_total")
+
+
 class SaleOrder(models.Model):
     _inherit = "sale.order"
 
@@ -18,7 +118,24 @@ class SaleOrder(models.Model):
     is_subscription_order = fields.Boolean(
         string="Is Subscription Order",
         compute="_compute_is_subscription_order",
-        store=False,
+        store=True,
+        index=True,
+    )
+
+    x_moyee_delivery_dirty = fields.Boolean(
+        string="Delivery Cost Outdated",
+        copy=False,
+        index=True,
+        help="Set when subscription lines changed; the delivery cost is recomputed shortly after by a scheduled action.",
+    )
+
+    x_moyee_commercial_partner_id = fields.Many2one(
+        "res.partner",
+        string="Commercial Partner",
+        related="partner_id.commercial_partner_id",
+        store=True,
+        index=True,
+        help="Stored copy of the customer's commercial entity; portal subscription and order lookups filter on it.",
     )
 
     moyee_removed_line_ids = fields.One2many(
@@ -27,92 +144,226 @@ class SaleOrder(models.Model):
         string="Removed Lines",
         domain=[("x_moyee_is_removed", "=", True)],
     )
+    moyee_archived_line_ids = fields.One2many(
+        comodel_name="moyee.subscription.line.archive",
+        inverse_name="order_id",
+        string="Archived Removed Lines",
+    )
+
+    def _auto_init(self):
+        # Fill the new column in SQL instead of recomputing every order through the ORM
+        if not column_exists(self.env.cr, self._table, "x_moyee_commercial_partner_id"):
+            create_column(self.env.cr, self._table, "x_moyee_commercial_partner_id", "int4")
+            self.env.cr.execute(
+                """
+                UPDATE sale_order so
+                   SET x_moyee_commercial_partner_id = p.commercial_partner_id
+                  FROM res_partner p
+                 WHERE p.id = so.partner_id
+                """
+            )
+        return super()._auto_init()
+
+    def init(self):
+        super().init()
+        # /my/home, /my/account: a customer's orders of one company in a given subscription state
+        columns = ["x_moyee_commercial_partner_id", "company_id"]
+        if "subscription_state" in self._fields and self._fields["subscription_state"].store:
+            columns.append("subscription_state")
+        create_index(
+            self.env.cr,
+            "sale_order_moyee_commercial_company_state_idx",
+            self._table,
+            columns,
+        )
 
     # ============================================================
     # Subscription detection (robust across Odoo builds)
     # ============================================================
+    def _moyee_subscription_marker_fields(self):
+        return [fname for fname in MOYEE_SUBSCRIPTION_MARKER_FIELDS if fname in self._fields]
+
     def _moyee_is_subscription_order(self):
         self.ensure_one()
-        for fname in (
-            "is_subscription",
-            "plan_id",
-            "subscription_state",
-            "subscription_status",
-            "recurring_plan_id",
-            "subscription_pricing_id",
-            "subscription_plan_id",
-            "recurring_pricing_id",
-        ):
-            if fname in self._fields and getattr(self, fname, False):
-                return True
-        return False
+        return self.is_subscription_order
 
+    @api.depends(lambda self: self._moyee_subscription_marker_fields())
     def _compute_is_subscription_order(self):
+        marker_fields = self._moyee_subscription_marker_fields()
         for order in self:
-            order.is_subscription_order = order._moyee_is_subscription_order()
+            order.is_subscription_order = any(order[fname] for fname in marker_fields)
 
     # ============================================================
     # Hide removed lines in invoices / reports / PDFs
     # ============================================================
     def _get_invoiceable_lines(self, final=False):
-        sub_orders = self.filtered(lambda o: o._moyee_is_subscription_order())
+        sub_orders = self.filtered("is_subscription_order")
         non_sub_orders = self - sub_orders
 
-        sub_lines = sub_orders.mapped("order_line").filtered(
-            lambda l: not l.display_type and not l.x_moyee_is_removed and float(l.product_uom_qty or 0.0) > 0.0
-        )
+        sub_lines = self.env["sale.order.line"]
+        if sub_orders:
+            sub_lines = sub_lines.search([("order_id", "in", sub_orders.ids)] + MOYEE_INVOICEABLE_LINE_DOMAIN)
 
         if non_sub_orders:
-            non_sub_lines = super(SaleOrder, non_sub_orders)._get_invoiceable_lines(final=final).filtered(
-                lambda l: l.display_type or (not l.x_moyee_is_removed and float(l.product_uom_qty or 0.0) > 0.0)
-            )
+            non_sub_lines = super(SaleOrder, non_sub_orders)._get_invoiceable_lines(final=final).filtered_domain(MOYEE_VISIBLE_LINE_DOMAIN)
             return sub_lines | non_sub_lines
 
         return sub_lines
 
     def _create_invoices(self, grouped=False, final=False, date=None):
         invoices = super()._create_invoices(grouped=grouped, final=final, date=date)
-        for inv in invoices:
-            to_remove = inv.invoice_line_ids.filtered(
-                lambda il: il.sale_line_ids and all(sl.x_moyee_is_removed or float(sl.product_uom_qty or 0.0) == 0.0 for sl in il.sale_line_ids)
-            )
-            if to_remove:
-                to_remove.unlink()
+        if not invoices:
+            return invoices
+        # Removed and zero-quantity lines are never selected by _get_invoiceable_lines;
+        # this single query only catches lines added by other modules' overrides.
+        stray_lines = self.env["account.move.line"].search([
+            ("move_id", "in", invoices.ids),
+            ("sale_line_ids", "!=", False),
+            ("sale_line_ids", "not any", [("x_moyee_is_removed", "=", False), ("product_uom_qty", "!=", 0.0)]),
+        ])
+        if stray_lines:
+            _logger.warning("Moyee: dropping %s invoice lines backed by removed sale lines.", len(stray_lines))
+            stray_lines.unlink()
         return invoices
 
+    @api.depends("order_line.invoice_lines", "moyee_archived_line_ids.invoice_line_ids")
+    def _get_invoiced(self):
+        # Archived removed lines no longer link their invoices through order_line
+        super()._get_invoiced()
+        for order in self.filtered("moyee_archived_line_ids"):
+            archived_invoices = order.moyee_archived_line_ids.invoice_line_ids.move_id.filtered(
+                lambda move: move.move_type in ("out_invoice", "out_refund")
+            )
+            if archived_invoices - order.invoice_ids:
+                order.invoice_ids |= archived_invoices
+                order.invoice_count = len(order.invoice_ids)
+
+    # ============================================================
+    # Chunked recurring invoicing (month-end run)
+    # ============================================================
+    @api.model
+    def _moyee_recurring_invoice_domain(self):
+        recurring_invoice_domain = getattr(self, "_recurring_invoice_domain", None)
+        if recurring_invoice_domain:
+            return recurring_invoice_domain()
+        # Called by the cron on an empty recordset: no per-record helpers here
+        next_date_field = self._moyee_get_next_date_field()
+        domain = [("is_subscription_order", "=", True), ("state", "=", "sale")]
+        if next_date_field:
+            domain.append((next_date_field, "<=", fields.Date.today()))
+        return domain
+
+    @api.model
+    def _cron_moyee_recurring_invoice(self, chunk_size=MOYEE_INVOICE_CHUNK_SIZE):
+        subscriptions = self.search(self._moyee_recurring_invoice_domain(), order="id")
+        return subscriptions._moyee_create_invoices_in_chunks(chunk_size=chunk_size)
+
+    def _moyee_create_invoices_in_chunks(self, chunk_size=MOYEE_INVOICE_CHUNK_SIZE, commit=None):
+        """
+        Invoice these subscriptions `chunk_size` at a time, committing and
+        logging progress after each chunk. A failing chunk is rolled back and
+        skipped when committing, re-raised otherwise.
+        Returns {"subscriptions", "invoices", "failed", "seconds"}.
+        """
+        auto_commit = (not self.env.registry.in_test_mode()) if commit is None else commit
+        chunks = list(split_every(chunk_size, self.ids))
+        stats = {"subscriptions": len(self), "invoices": 0, "failed": 0, "seconds": 0.0}
+        done = 0
+        start = time.perf_counter()
+
+        for index, chunk_ids in enumerate(chunks, start=1):
+            chunk = self.browse(chunk_ids)
+            try:
+                if hasattr(chunk, "_create_recurring_invoice"):
+                    invoices = chunk._create_recurring_invoice()
+                else:
+                    invoices = chunk._create_invoices()
+                stats["invoices"] += len(invoices or [])
+                if auto_commit:
+                    self.env.cr.commit()
+            except Exception:
+                if not auto_commit:
+                    raise
+                self.env.cr.rollback()
+                stats["failed"] += len(chunk_ids)
+                _logger.exception("Moyee invoicing: chunk %s/%s failed (orders %s).", index, len(chunks), chunk_ids)
+
+            done += len(chunk_ids)
+            # Keep the record cache bounded over thousands of subscriptions
+            self.env.invalidate_all()
+            _logger.info(
+                "Moyee invoicing: chunk %s/%s, %s/%s subscriptions, %s invoices, %s failed, %.1fs",
+                index, len(chunks), done, stats["subscriptions"], stats["invoices"], stats["failed"],
+                time.perf_counter() - start,
+            )
+
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
     def _get_order_lines_to_report(self):
         try:
             lines = super()._get_order_lines_to_report()
         except AttributeError:
             # Some builds don't have this method
             lines = self.order_line
-        return lines.filtered(
-            lambda l: l.display_type or (not l.x_moyee_is_removed and float(l.product_uom_qty or 0.0) > 0.0)
-        )
+        return lines.filtered_domain(MOYEE_VISIBLE_LINE_DOMAIN)
+
+    def _moyee_get_visible_lines(self):
+        """Return the active lines and section/note lines, in order line order."""
+        self.ensure_one()
+        SaleOrderLine = self.env["sale.order.line"]
+        return SaleOrderLine.search([("order_id", "=", self.id)] + MOYEE_VISIBLE_LINE_DOMAIN, order=SaleOrderLine._order)
 
     def _moyee_get_sub_lines(self):
         """Return active, non-removed subscription product lines (excluding delivery and display lines)."""
         self.ensure_one()
-        return self.order_line.filtered(
-            lambda l: not l.x_moyee_is_removed and not l.display_type and l.product_id and not l._moyee_is_delivery_line()
+        return self.order_line.filtered_domain(
+            MOYEE_ACTIVE_LINE_DOMAIN + [("product_id", "!=", False), ("x_moyee_line_role", "in", ("product", "discount"))]
         )
 
     def _moyee_get_delivery_lines(self):
         """Return active, non-removed delivery lines."""
         self.ensure_one()
-        return self.order_line.filtered(
-            lambda l: not l.x_moyee_is_removed and not l.display_type and l._moyee_is_delivery_line()
+        return self.order_line.filtered_domain(
+            MOYEE_ACTIVE_LINE_DOMAIN + [("x_moyee_line_role", "in", MOYEE_DELIVERY_LINE_ROLES)]
         )
 
-    def _moyee_auto_recompute_delivery(self):
-        """Automatically recalculate delivery shipping cost when subscription lines change,
+    def _moyee_auto_recompute_delivery(self, force=False):
+        """Queue a delivery cost recompute after subscription lines change.
+
+        Orders are only flagged here: repeated changes in one transaction
+        coalesce into a single cron run right after commit. Pass force=True
+        (or the `moyee_force_delivery_recompute` context key) when the caller
+        needs the new total immediately.
+        """
+        orders = self.filtered(lambda o: getattr(o, "carrier_id", False))
+        if not orders:
+            return
+        if force or self.env.context.get("moyee_force_delivery_recompute"):
+            orders._moyee_recompute_delivery_now()
+            return
+
+        orders.filtered(lambda o: not o.x_moyee_delivery_dirty).sudo().write({"x_moyee_delivery_dirty": True})
+        # Trigger the cron once per transaction, however many orders changed
+        if not self.env.cr.precommit.data.get("moyee.delivery_recompute_triggered"):
+            self.env.cr.precommit.data["moyee.delivery_recompute_triggered"] = True
+            cron = self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_recompute_delivery", raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    def _moyee_queue_note(self, body, author_partner=None):
+        """Queue an internal chatter note on these orders (posted in batch by a cron, see moyee.subscription.note)."""
+        return self.env["moyee.subscription.note"]._moyee_enqueue(self, body, author_partner=author_partner)
+
+    def _moyee_recompute_delivery_now(self):
+        """Recalculate delivery shipping cost synchronously,
         avoiding 'already invoiced' UserError on subscription orders."""
         for order in self:
             if not getattr(order, 'carrier_id', False):
                 continue
             try:
-                # Call carrier rate computation for updated order lines/weight
-                res = order.carrier_id.rate_shipment(order)
+                # Carrier rate for updated order lines/weight (memoized per destination/weight bucket)
+                res = self.env["moyee.shipping.rate.cache"].moyee_rate_shipment(order)
                 if res.get('success'):
                     price_unit = float(res.get('price', 0.0))
                     delivery_lines = order._moyee_get_delivery_lines()
@@ -135,42 +386,93 @@ class SaleOrder(models.Model):
                     order._compute_amounts()
             except Exception as e:
                 _logger.warning("Moyee: Auto delivery recompute error on SO %s: %s", order.name, str(e))
+            # One attempt per change, as before; the next line change flags it again
+            if order.x_moyee_delivery_dirty:
+                order.sudo().write({"x_moyee_delivery_dirty": False})
+
+    @api.model
+    def _cron_moyee_recompute_dirty_delivery(self, limit=200):
+        """Recompute delivery cost of orders flagged by _moyee_auto_recompute_delivery."""
+        orders = self.sudo().search([("x_moyee_delivery_dirty", "=", True)], limit=limit, order="id")
+        for order in orders:
+            try:
+                with self.env.cr.savepoint():
+                    order._moyee_recompute_delivery_now()
+            except Exception:
+                _logger.exception("Moyee: Deferred delivery recompute failed on SO %s.", order.name)
+                order.write({"x_moyee_delivery_dirty": False})
+        if len(orders) == limit:
+            self.env.ref("moyee_subscription_portal_manager.ir_cron_moyee_recompute_delivery")._trigger()
+        return len(orders)
 
     @api.depends('order_line.price_subtotal', 'order_line.price_tax', 'order_line.price_total', 'order_line.x_moyee_is_removed')
     def _compute_amounts(self):
         super()._compute_amounts()
-        for order in self:
-            if order._moyee_is_subscription_order():
-                order_lines = order.order_line.filtered(lambda x: not x.display_type and not x.x_moyee_is_removed)
-
-                # Update standard Odoo subscription fields if present (e.g. Recurring Amount / MRR)
-                for fname in ("recurring_amount_untaxed", "recurring_amount_tax", "recurring_amount_total"):
-                    if fname in order._fields:
-                        active_sub_lines = order_lines.filtered(lambda l: l._moyee_is_subscription_line() if hasattr(l, "_moyee_is_subscription_line") else True)
-                        if fname == "recurring_amount_untaxed":
-                            order[fname] = sum(active_sub_lines.mapped('price_subtotal'))
-                        elif fname == "recurring_amount_tax":
-                            order[fname] = sum(active_sub_lines.mapped('price_tax'))
-                        elif fname == "recurring_amount_total":
-                            order[fname] = sum(active_sub_lines.mapped('price_total'))
-
-                for fname in ("non_recurring_amount_untaxed", "non_recurring_amount_tax", "non_recurring_amount_total"):
-                    if fname in order._fields:
-                        one_time_lines = order_lines.filtered(lambda l: not l._moyee_is_subscription_line() if hasattr(l, "_moyee_is_subscription_line") else False)
-                        if fname == "non_recurring_amount_untaxed":
-                            order[fname] = sum(one_time_lines.mapped('price_subtotal'))
-                        elif fname == "non_recurring_amount_tax":
-                            order[fname] = sum(one_time_lines.mapped('price_tax'))
-                        elif fname == "non_recurring_amount_total":
-                            order[fname] = sum(one_time_lines.mapped('price_total'))
+        sub_orders = self.filtered("is_subscription_order")
+        recurring_fields = [f for f in MOYEE_RECURRING_AMOUNT_FIELDS if f in self._fields]
+        one_time_fields = [f for f in MOYEE_NON_RECURRING_AMOUNT_FIELDS if f in self._fields]
+        if not sub_orders or not (recurring_fields or one_time_fields):
+            return
+
+        # Update standard Odoo subscription fields if present (e.g. Recurring Amount / MRR):
+        # one pass over each order's lines. Every active line of a subscription order is a
+        # subscription line (_moyee_is_subscription_line), so the one-time amounts are zero.
+        for order in sub_orders:
+            totals = [0.0, 0.0, 0.0]
+            for line in order.order_line:
+                if line.display_type or line.x_moyee_is_removed:
+                    continue
+                totals[0] += line.price_subtotal
+                totals[1] += line.price_tax
+                totals[2] += line.price_total
+            for fname in recurring_fields:
+                order[fname] = totals[MOYEE_RECURRING_AMOUNT_FIELDS.index(fname)]
+            for fname in one_time_fields:
+                order[fname] = 0.0
 
     # ============================================================
     # Portal security helpers
     # ============================================================
     def _moyee_portal_check_access(self, *, portal_user=None, access_token=None, require_subscription=True):
+        """
+        Raise unless portal_user may manage this subscription. A successful check
+        is remembered for the rest of the transaction (the controller's check
+        covers the model method's one), together with a fingerprint of the order
+        and portal user values it depends on: if any of them changes, the full
+        check runs again.
+        """
         self.ensure_one()
         portal_user = portal_user or self.env.user
 
+        memo = self.env.cr.cache.setdefault("moyee_portal_access", {})
+        key = (self.id, self.env.uid, portal_user.id, access_token or None, bool(require_subscription))
+        fingerprint = self._moyee_portal_access_fingerprint(portal_user)
+        if memo.get(key) == fingerprint:
+            return True
+
+        self._moyee_portal_verify_access(
+            portal_user=portal_user, access_token=access_token, require_subscription=require_subscription,
+        )
+        memo[key] = fingerprint
+        return True
+
+    def _moyee_portal_access_fingerprint(self, portal_user):
+        """Values of the order and portal user fields _moyee_portal_verify_access reads."""
+        self.ensure_one()
+        return (
+            self.partner_id.id,
+            self.partner_id.commercial_partner_id.id,
+            portal_user.partner_id.id,
+            portal_user.partner_id.commercial_partner_id.id,
+            portal_user.active,
+            self.state,
+            self.is_subscription_order,
+            self.access_token,
+        ) + tuple(self[fname] for fname in ("subscription_state", "subscription_status") if fname in self._fields)
+
+    def _moyee_portal_verify_access(self, *, portal_user, access_token=None, require_subscription=True):
+        self.ensure_one()
+
         # 1. Token-based access (shared links)
         if access_token and self.access_token and access_token == self.access_token:
             return True
@@ -213,7 +515,11 @@ class SaleOrder(models.Model):
     # ============================================================
     def _moyee_get_subscription_next_date_field_name(self):
         self.ensure_one()
-        for fname in ("recurring_next_date", "next_invoice_date", "next_delivery_date", "x_next_delivery_date"):
+        return self._moyee_get_next_date_field()
+
+    @api.model
+    def _moyee_get_next_date_field(self):
+        for fname in MOYEE_NEXT_DATE_FIELDS:
             if fname in self._fields:
                 return fname
         return False
@@ -224,42 +530,12 @@ class SaleOrder(models.Model):
     def _moyee_get_portal_addable_products(self):
         self.ensure_one()
         Product = self.env["product.product"].sudo()
-        Template = self.env["product.template"].sudo()
-
-        domain = [("sale_ok", "=", True)]
-        if "subscription_ok" in Template._fields:
-            domain.append(("product_tmpl_id.subscription_ok", "=", True))
-        elif "recurring_invoice" in Template._fields:
-            domain.append(("product_tmpl_id.recurring_invoice", "=", True))
-
-        if "company_id" in Product._fields and self.company_id:
-            domain.append(("company_id", "in", [False, self.company_id.id]))
-
-        # Filter by 'Subscription' tag if tag_ids field exists on product.template
-        if "tag_ids" in Template._fields:
-            domain.append(("product_tmpl_id.tag_ids.name", "ilike", "Subscription"))
-
-        # Exclude internal/delivery/non-coffee products (only allow physical products: storable/consumable)
-        if "detailed_type" in Product._fields:
-            domain.append(("detailed_type", "in", ["consu", "product"]))
-        elif "type" in Product._fields:
-            domain.append(("type", "in", ["consu", "product"]))
-
-        products = Product.search(domain, order="name, id", limit=200)
-
-        # Exclude service/maintenance/accessory/delivery products
-        exclude_keywords = {"onderhoud", "service", "maintenance", "installatie", "repair", "reparatie", "schoonmaak", "cleaning", "reiniging", "optie", "support", "delivery", "shipping", "bezorg", "levering", "verzend", "verzending", "verzendkosten", "transport", "postnl", "dhl", "ups"}
-        filtered_products = Product.browse()
-        for p in products:
-            if getattr(p, 'is_delivery', False) or getattr(p.product_tmpl_id, 'is_delivery', False):
-                continue
-            p_name = (p.name or "").lower()
-            p_code = (p.default_code or "").lower()
-            if any(kw in p_name or kw in p_code for kw in exclude_keywords):
-                continue
-            filtered_products += p
-
-        return filtered_products
+        website = self.website_id if "website_id" in self._fields else False
+        product_ids = Product._moyee_get_portal_catalog_ids(
+            self.company_id.id or False,
+            website.id if website else False,
+        )
+        return Product.browse(product_ids)
 
     @api.model
     def moyee_extract_product_metadata(self, product=None):
@@ -269,104 +545,8 @@ class SaleOrder(models.Model):
         """
         if not product:
             return "other", "other"
-
-        grind = "other"
-        weight = "other"
-
-        # 1. Check variant attributes
-        attr_values = getattr(product, "product_template_attribute_value_ids", False)
-        if attr_values:
-            for av in attr_values:
-                if grind != "other":
-                    break
-                attr_name = (av.attribute_id.name or "").lower()
-                val_name = (av.name or "").lower()
-
-                if "grind" in attr_name or "maling" in attr_name or "brew" in attr_name or "hoe zet je" in attr_name or "how do you brew" in attr_name:
-                    if "capsule" in val_name or "cup" in val_name:
-                        grind = "capsules"
-                    elif "whole" in val_name or "boon" in val_name or "bonen" in val_name:
-                        grind = "whole"
-                    elif "filter" in val_name:
-                        grind = "filter"
-                    elif "espresso" in val_name:
-                        grind = "espresso"
-
-            for av in attr_values:
-                if weight != "other":
-                    break
-                attr_name = (av.attribute_id.name or "").lower()
-                val_name = (av.name or "").lower()
-                if "weight" in attr_name or "size" in attr_name or "gewicht" in attr_name or "inhoud" in attr_name:
-                    v_clean = val_name.replace(" ", "")
-                    if "capsules" in v_clean or "capsule" in v_clean or "cups" in v_clean or "25caps" in v_clean:
-                        weight = "25caps"
-                    elif "1kg" in v_clean or "1.0kg" in v_clean or "1000g" in v_clean or "1000 g" in val_name:
-                        weight = "1kg"
-                    elif "250g" in v_clean or "250" in v_clean or "0.25kg" in v_clean or "0.25 kg" in val_name:
-                        weight = "250g"
-
-        # 2. Check template attribute lines if still 'other'
-        tmpl = getattr(product, "product_tmpl_id", False)
-        if tmpl and (grind == "other" or weight == "other"):
-            for line in getattr(tmpl, "attribute_line_ids", []):
-                attr_name = (line.attribute_id.name or "").lower()
-                val_names = [v.name.lower() for v in line.value_ids if v.name]
-
-                if grind == "other" and ("grind" in attr_name or "maling" in attr_name or "brew" in attr_name or "how do you brew" in attr_name or "hoe zet je" in attr_name):
-                    for val_name in val_names:
-                        if "capsule" in val_name or "cup" in val_name:
-                            grind = "capsules"
-                            break
-                        elif "whole" in val_name or "boon" in val_name or "bonen" in val_name:
-                            grind = "whole"
-                            break
-                        elif "filter" in val_name:
-                            grind = "filter"
-                            break
-                        elif "espresso" in val_name:
-                            grind = "espresso"
-                            break
-
-                if weight == "other" and ("weight" in attr_name or "size" in attr_name or "gewicht" in attr_name or "inhoud" in attr_name):
-                    for val_name in val_names:
-                        v_clean = val_name.replace(" ", "")
-                        if "capsules" in v_clean or "capsule" in v_clean or "cups" in v_clean or "25caps" in v_clean:
-                            weight = "25caps"
-                            break
-                        elif "1kg" in v_clean or "1.0kg" in v_clean or "1000g" in v_clean:
-                            weight = "1kg"
-                            break
-                        elif "250g" in v_clean or "250" in v_clean or "0.25kg" in v_clean:
-                            weight = "250g"
-                            break
-
-        # 3. Fallback to name scanning if still 'other'
-        name = (getattr(product, "display_name", "") or getattr(product, "name", "") or "").lower()
-        if grind == "other":
-            if "capsule" in name or "cup" in name:
-                grind = "capsules"
-            elif "whole" in name or "boon" in name or "bonen" in name:
-                grind = "whole"
-            elif "filter grind" in name or "filtergrind" in name or "filter" in name:
-                grind = "filter"
-            elif "espresso grind" in name or "espressogrind" in name or "espresso" in name:
-                grind = "espresso"
-            else:
-                grind = "whole"  # Default fallback for coffee products
-
-        if weight == "other":
-            name_clean = name.replace(" ", "")
-            if "capsule" in name_clean or "cups" in name_clean or any(x in name_clean for x in ("25caps", "25capsule", "25cups")):
-                weight = "25caps"
-            elif "1kg" in name_clean or "1000g" in name_clean or "1.0kg" in name_clean:
-                weight = "1kg"
-            elif "250g" in name_clean or "0.25kg" in name_clean or "250" in name_clean:
-                weight = "250g"
-            else:
-                weight = "1kg"  # Default fallback
-
-        return grind, weight
+        res = self.env["moyee.attribute.classifier"].moyee_classify_product(product)
+        return res["grind"], res["weight"]
 
     @api.model
     def moyee_extract_coffee_characteristics(self, product=None):
@@ -378,76 +558,8 @@ class SaleOrder(models.Model):
         """
         if not product:
             return "other", "other"
-
-        bold = "other"
-        fruity = "other"
-
-        # 1. Check variant attributes
-        attr_values = getattr(product, "product_template_attribute_value_ids", False)
-        if attr_values:
-            for av in attr_values:
-                attr_name = (av.attribute_id.name or "").lower()
-                val_name = (av.name or "").lower()
-
-                if "bold" in attr_name or "sterkte" in attr_name or "how bold" in attr_name or "strength" in attr_name:
-                    if "light" in val_name or "mild" in val_name:
-                        bold = "light"
-                    elif "medium" in val_name:
-                        bold = "medium"
-                    elif "bold" in val_name or "donker" in val_name or "intens" in val_name or "dark" in val_name:
-                        bold = "bold"
-
-                if "fruity" in attr_name or "fruity?" in attr_name or "vol of fruitig" in attr_name or "full or fruity" in attr_name or "smaak" in attr_name or "flavor" in attr_name:
-                    if "full" in val_name or "vol" in val_name:
-                        fruity = "full"
-                    elif "fruity" in val_name or "fruitig" in val_name:
-                        fruity = "fruity"
-
-        # 2. Check template attribute lines if still 'other'
-        tmpl = getattr(product, "product_tmpl_id", False)
-        if tmpl and (bold == "other" or fruity == "other"):
-            for line in getattr(tmpl, "attribute_line_ids", []):
-                attr_name = (line.attribute_id.name or "").lower()
-                val_names = [v.name.lower() for v in line.value_ids if v.name]
-
-                if bold == "other" and ("bold" in attr_name or "sterkte" in attr_name or "how bold" in attr_name or "strength" in attr_name):
-                    for val_name in val_names:
-                        if "light" in val_name or "mild" in val_name:
-                            bold = "light"
-                            break
-                        elif "medium" in val_name:
-                            bold = "medium"
-                            break
-                        elif "bold" in val_name or "donker" in val_name or "intens" in val_name or "dark" in val_name:
-                            bold = "bold"
-                            break
-
-                if fruity == "other" and ("fruity" in attr_name or "fruity?" in attr_name or "vol of fruitig" in attr_name or "full or fruity" in attr_name or "smaak" in attr_name or "flavor" in attr_name):
-                    for val_name in val_names:
-                        if "full" in val_name or "vol" in val_name:
-                            fruity = "full"
-                            break
-                        elif "fruity" in val_name or "fruitig" in val_name:
-                            fruity = "fruity"
-                            break
-
-        # 3. Fallback to product name scan if still 'other'
-        name = (getattr(product, "name", "") or getattr(product, "display_name", "") or "").lower()
-        if bold == "other":
-            if "light" in name or "mild" in name:
-                bold = "light"
-            elif "medium" in name:
-                bold = "medium"
-            elif "bold" in name or "intens" in name or "dark" in name or "donker" in name:
-                bold = "bold"
-
-        if fruity == "other":
-            if "full" in name or "vol" in name:
-                fruity = "full"
-            elif "fruity" in name or "fruitig" in name:
-                fruity = "fruity"
-
-        return bold, fruity
+        res = self.env["moyee.attribute.classifier"].moyee_classify_product(product)
+        return res["bold"], res["fruity"]
 
     # ============================================================
     # ✅ UNIVERSAL: Plan field + plan model resolver (FIXED)
@@ -488,27 +600,30 @@ class SaleOrder(models.Model):
 
     # ============================================================
     # ✅ Interval/Plan list for portal (works with plan_id)
+    # Memoized per company / current plan; cleared by plan writes.
     # ============================================================
-    def _moyee_get_portal_changeable_plans(self):
-        """
-        Return plans customer can choose from.
+    @api.model
+    @moyee_ormcache("plans", "plan_model", "company_id")
+    def _moyee_get_company_plan_ids(self, plan_model, company_id):
+        """Ids of every plan (inactive included) usable by company_id: its own plus the global ones."""
+        Plan = self.env[plan_model].sudo().with_context(active_test=False)
+        domain = []
+        if "company_id" in Plan._fields and company_id:
+            # ✅ safest default: order company + global (company_id False)
+            domain = [("company_id", "in", [False, company_id])]
+        order_by = "sequence, name, id" if "sequence" in Plan._fields else "name, id"
+        return tuple(Plan.search(domain, order=order_by).ids)
 
-        ✅ Works with plan_id (sale.subscription.plan) in your DB
-        ✅ Includes inactive plans (active_test=False) to avoid empty list
-        ✅ Multi-company safe context for SaaS
+    @api.model
+    @moyee_ormcache("plans", "plan_model", "company_id", "current_plan_id")
+    def _moyee_get_changeable_plan_index(self, plan_model, company_id, current_plan_id):
         """
-        self.ensure_one()
-
-        plan_field, Plan = self._moyee_get_plan_model()
-        if not plan_field:
-            return self.env["ir.model"].browse([])
-
-        # Portal-safe context (VERY IMPORTANT on SaaS)
-        company_ids = self.env["res.company"].sudo().search([]).ids
-        Plan = Plan.with_context(allowed_company_ids=company_ids, active_test=False)
-
-        current_plan = self[plan_field]
-        if current_plan:
+        (ordered plan ids, frozenset of the same ids) a subscription on
+        current_plan_id may switch to: the plan's optional plans if it has
+        any, otherwise every plan of the company.
+        """
+        if current_plan_id:
+            current_plan = self.env[plan_model].sudo().browse(current_plan_id).exists()
             # Optional plans feature: different field names across builds
             for fname in (
                 "optional_plans",
@@ -516,19 +631,46 @@ class SaleOrder(models.Model):
                 "optional_recurring_plan_ids",
                 "optional_recurring_plans",
             ):
-                if fname in current_plan._fields:
-                    optional = current_plan[fname]
+                if current_plan and fname in current_plan._fields:
+                    optional = current_plan.with_context(active_test=False)[fname]
                     if optional:
-                        return optional.with_context(active_test=False).sudo()
+                        return tuple(optional.ids), frozenset(optional.ids)
+        plan_ids = self._moyee_get_company_plan_ids(plan_model, company_id)
+        return plan_ids, frozenset(plan_ids)
 
-        # Fallback: return all plans
-        domain = []
-        if "company_id" in Plan._fields and self.company_id:
-            # ✅ safest default: order company + global (company_id False)
-            domain = [("company_id", "in", [False, self.company_id.id])]
+    def _moyee_get_changeable_plan_index_for_order(self):
+        self.ensure_one()
+        plan_field, Plan = self._moyee_get_plan_model()
+        if not plan_field:
+            return False, (), frozenset()
+        plan_ids, plan_id_set = self._moyee_get_changeable_plan_index(
+            Plan._name, self.company_id.id or False, self[plan_field].id or False,
+        )
+        return Plan, plan_ids, plan_id_set
 
-        order_by = "sequence, name, id" if "sequence" in Plan._fields else "name, id"
-        return Plan.search(domain, order=order_by)
+    def _moyee_get_portal_changeable_plans(self):
+        """
+        Return plans customer can choose from.
+
+        ✅ Works with plan_id (sale.subscription.plan) in your DB
+        ✅ Includes inactive plans (active_test=False) to avoid empty list
+        ✅ Limited to the order company + global plans
+        """
+        self.ensure_one()
+        Plan, plan_ids, _plan_id_set = self._moyee_get_changeable_plan_index_for_order()
+        if not Plan:
+            return self.env["ir.model"].browse([])
+        return Plan.with_context(active_test=False).browse(plan_ids)
+
+    def _moyee_get_company_plans(self):
+        """Every plan of the order company (global plans included), ignoring optional plans."""
+        self.ensure_one()
+        plan_field, Plan = self._moyee_get_plan_model()
+        if not plan_field:
+            return self.env["ir.model"].browse([])
+        return Plan.with_context(active_test=False).browse(
+            self._moyee_get_company_plan_ids(Plan._name, self.company_id.id or False)
+        )
 
     # ============================================================
     # ✅ Change interval (write to correct field)
@@ -551,107 +693,166 @@ class SaleOrder(models.Model):
         if not plan_id:
             raise ValidationError(_("Please select an interval."))
 
-        allowed_plans = self._moyee_get_portal_changeable_plans()
-        if not allowed_plans.filtered(lambda p: p.id == plan_id):
+        _Plan, _plan_ids, allowed_plan_ids = self._moyee_get_changeable_plan_index_for_order()
+        if plan_id not in allowed_plan_ids:
             raise AccessError(_("Selected interval is not allowed."))
 
         # ✅ Write to correct field name used by this DB (plan_id)
         self.sudo().write({plan_field: plan_id})
 
-        self.with_user(1).message_post(
-            body=_("Moyee: customer changed subscription interval via portal."),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer changed subscription interval via portal."),
+            author_partner=portal_user.partner_id,
         )
         return True
 
     # ============================================================
-    # ✅ Pause / Resume (robust)
+    # ✅ Pause / Resume / Close: strategy resolved once per registry
     # ============================================================
-    def _moyee_set_subscription_paused_state(self, paused=True):
-        self.ensure_one()
+    @api.model
+    @moyee_ormcache("subscription", "transition")
+    def _moyee_get_state_strategy(self, transition):
+        """
+        Return how this database performs `transition` ("pause", "resume" or "close"):
+        ("field", field_name, key, source keys), ("method", method_name, None, None),
+        ("stage", stage_field, stage_id, source stage ids) or None. The sources are the
+        values an order must have for the transition to apply (see "from" in
+        MOYEE_STATE_TRANSITIONS). Depends only on the installed modules and the stage
+        records, so it is kept in the "subscription" cache (reset from the Moyee settings
+        or by a registry reload).
+        """
+        spec = MOYEE_STATE_TRANSITIONS[transition]
 
-        # ✅ 1) PRIORITY: Direct subscription_state field write (Odoo 18 Enterprise)
-        #    Odoo 18 uses: 3_progress (active), 4_paused (paused)
+        # 1) Odoo 18 subscription_state (3_progress / 4_paused / 6_churn)
         if "subscription_state" in self._fields:
-            current = self.subscription_state or ""
-            if paused and current != "4_paused":
-                self.sudo().write({"subscription_state": "4_paused"})
-                return True
-            elif not paused and current == "4_paused":
-                self.sudo().write({"subscription_state": "3_progress"})
-                return True
-            elif paused and current == "4_paused":
-                return True  # already paused
-            elif not paused and current != "4_paused":
-                return True  # already active
-
-        # 2) method-based fallback (other Odoo builds)
-        if paused:
-            for m in ("action_pause", "action_suspend", "action_subscription_pause", "action_set_to_pause"):
-                if hasattr(self, m):
-                    getattr(self.sudo(), m)()
-                    return True
-        else:
-            for m in ("action_resume", "action_reactivate", "action_subscription_resume", "action_set_to_progress"):
-                if hasattr(self, m):
-                    getattr(self.sudo(), m)()
-                    return True
+            key = _moyee_pick_selection_key(self, "subscription_state", spec["state_keys"])
+            if key:
+                return ("field", "subscription_state", key, self._moyee_get_state_sources(transition, "subscription_state", "state_keys"))
+
+        # 2) action_* methods of other subscription builds (they check the source state themselves)
+        for method in spec["methods"]:
+            if hasattr(self, method):
+                return ("method", method, None, None)
 
-        # 3) stage-based fallback
+        # 3) generic subscription_status selection
+        if "subscription_status" in self._fields:
+            key = _moyee_pick_selection_key(self, "subscription_status", spec["status_keys"])
+            if key:
+                return ("field", "subscription_status", key, self._moyee_get_state_sources(transition, "subscription_status", "status_keys"))
+
+        # 4) stage records
         for stage_field in ("subscription_stage_id", "stage_id"):
             if stage_field in self._fields:
-                Stage = self.env[self._fields[stage_field].comodel_name].sudo()
-
-                if paused:
-                    target = (
-                        Stage.search([("name", "ilike", "pause")], limit=1)
-                        or Stage.search([("name", "ilike", "suspend")], limit=1)
-                        or Stage.search([("name", "ilike", "hold")], limit=1)
-                    )
-                else:
-                    target = (
-                        Stage.search([("name", "ilike", "progress")], limit=1)
-                        or Stage.search([("name", "ilike", "in progress")], limit=1)
-                        or Stage.search([("name", "ilike", "running")], limit=1)
-                        or Stage.search([("name", "ilike", "active")], limit=1)
-                    )
-
-                if target:
-                    self.sudo().write({stage_field: target.id})
-                    return True
-
-        # 4) generic selection field fallback
-        def _set_selection(field_name):
-            if field_name not in self._fields:
-                return False
-            selection = self._fields[field_name].selection or []
-            keys = [k for k, _lbl in selection]
-
-            def _pick(candidates):
-                for cand in candidates:
-                    for k in keys:
-                        if k == cand:
-                            return k
-                for cand in candidates:
-                    for k in keys:
-                        if cand in str(k).lower():
-                            return k
-                return None
-
-            if paused:
-                key = _pick(("4_paused", "paused", "pause", "suspended", "suspend", "hold"))
+                stage = self._moyee_find_state_stage(stage_field, spec["stage_names"])
+                if stage:
+                    sources = frozenset(
+                        self._moyee_find_state_stage(stage_field, MOYEE_STATE_SOURCES[source]["stage_names"]).id
+                        for source in spec["from"]
+                    ) - {False}
+                    return ("stage", stage_field, stage.id, sources)
+        return None
+
+    @api.model
+    def _moyee_get_state_sources(self, transition, field_name, keys_name):
+        """Selection keys of field_name an order must be in for `transition` to apply."""
+        return frozenset(
+            key for key in (
+                _moyee_pick_selection_key(self, field_name, MOYEE_STATE_SOURCES[source][keys_name])
+                for source in MOYEE_STATE_TRANSITIONS[transition]["from"]
+            ) if key
+        )
+
+    @api.model
+    def _moyee_find_state_stage(self, stage_field, names):
+        Stage = self.env[self._fields[stage_field].comodel_name].sudo()
+        for name in names:
+            stage = Stage.search([("name", "ilike", name)], limit=1)
+            if stage:
+                return stage
+        return Stage
+
+    @api.model
+    def _moyee_get_state_strategy_report(self):
+        """One line per transition, for the diagnostic box in the Moyee settings."""
+        lines = []
+        for transition in MOYEE_STATE_TRANSITIONS:
+            strategy = self._moyee_get_state_strategy(transition)
+            if not strategy:
+                lines.append("%s: not available" % transition)
+            elif strategy[0] == "method":
+                lines.append("%s: call %s()" % (transition, strategy[1]))
             else:
-                key = _pick(("3_progress", "in_progress", "progress", "running", "active", "open"))
+                lines.append("%s: write %s = %r (from %s)" % (
+                    transition, strategy[1], strategy[2], ", ".join(sorted(map(str, strategy[3]))) or "nothing",
+                ))
+        close_reason_id = self._moyee_get_close_reason_id(False)
+        lines.append("default close reason id: %s" % (close_reason_id or "none"))
+        return "\n".join(lines)
 
-            if key:
-                self.sudo().write({field_name: key})
-                return True
+    @api.model
+    @moyee_ormcache("subscription", "reason")
+    def _moyee_get_close_reason_id(self, reason):
+        """close_reason_id matching `reason` by name, else the first close reason (False if none)."""
+        if "close_reason_id" not in self._fields:
             return False
+        CloseReason = self.env[self._fields["close_reason_id"].comodel_name].sudo()
+        close_reason = CloseReason.search([("name", "ilike", reason)], limit=1) if reason else CloseReason
+        if not close_reason:
+            close_reason = CloseReason.search([], limit=1)
+        return close_reason.id or False
+
+    def _moyee_split_state_transition(self, transition):
+        """
+        (allowed, already, rejected) orders for `transition`: orders in one of its source
+        states, orders already in its target state, and every other order. Method
+        strategies validate the source state themselves, so all orders are allowed.
+        """
+        strategy = self._moyee_get_state_strategy(transition)
+        if not strategy or strategy[0] == "method":
+            return self, self.browse(), self.browse()
+        mechanism, target, value, sources = strategy
 
-        if _set_selection("subscription_status"):
+        def _current(order):
+            return order[target].id if mechanism == "stage" else order[target]
+
+        already = self.filtered(lambda o: _current(o) == value)
+        allowed = (self - already).filtered(lambda o: _current(o) in sources)
+        return allowed, already, self - already - allowed
+
+    def _moyee_apply_state_transition(self, transition, extra_vals=None, strict=True):
+        """
+        Apply the resolved strategy for `transition` with a single write (or method call)
+        to the orders in one of its source states. Orders already in the target state are
+        left alone; any other order raises a UserError, or is skipped when not strict.
+        Returns False when this database has no strategy for `transition`.
+        """
+        strategy = self._moyee_get_state_strategy(transition)
+        if not strategy:
+            return False
+        mechanism, target, value, _sources = strategy
+        allowed, _already, rejected = self._moyee_split_state_transition(transition)
+        if rejected and strict:
+            messages = {
+                "pause": _("Only running or renewing subscriptions can be paused: %s"),
+                "resume": _("Only paused subscriptions can be resumed: %s"),
+                "close": _("Only running, renewing or paused subscriptions can be closed: %s"),
+            }
+            raise UserError(messages[transition] % ", ".join(rejected.mapped("display_name")))
+        if not allowed:
             return True
+        vals = dict(extra_vals or {})
+        if mechanism == "method":
+            if vals:
+                allowed.sudo().write(vals)
+            getattr(allowed.sudo(), target)()
+            return True
+        allowed.sudo().write(dict(vals, **{target: value}))
+        return True
 
+    def _moyee_set_subscription_paused_state(self, paused=True):
+        self.ensure_one()
+        if self._moyee_apply_state_transition("pause" if paused else "resume"):
+            return True
         raise UserError(_("Pause/resume is not available for this subscription implementation."))
 
     def moyee_portal_pause(self, *, portal_user_id, pause_until_date=None, access_token=None):
@@ -679,34 +880,50 @@ class SaleOrder(models.Model):
                         raise
                     _logger.exception("Moyee: Failed to pause subscription next date update.")
 
-        self.with_user(1).message_post(
-            body=_("Moyee: customer paused the subscription via portal. Next resume date: %s") % (pause_until_date or 'No change'),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer paused the subscription via portal. Next resume date: %s") % (pause_until_date or 'No change'),
+            author_partner=portal_user.partner_id,
         )
         return True
 
     # ============================================================
-    # ✅ Skip delivery (portal)
+    # Plan catalog: interval + sort rank per plan ("plans" cache,
+    # cleared by relevant sale.subscription.plan changes)
     # ============================================================
-    def moyee_portal_skip_delivery(self, *, portal_user_id, access_token=None):
-        self.ensure_one()
-        portal_user = self.env["res.users"].browse(int(portal_user_id)).exists()
-        if not portal_user:
-            raise AccessError(_("Invalid user."))
-        if not self.env.user.has_group("base.group_user") and portal_user.id != self.env.user.id:
-            raise AccessError(_("You cannot perform actions on behalf of another user."))
+    @api.model
+    @moyee_ormcache("plans", "plan_model")
+    def _moyee_get_plan_catalog(self, plan_model):
+        """{plan_id: (relativedelta of one period, portal sort rank)} for every plan of plan_model."""
+        plans = self.env[plan_model].sudo().with_context(active_test=False, lang="en_US").search([])
+        return {
+            plan.id: (self._moyee_compute_plan_interval(plan), self._moyee_compute_plan_rank(plan))
+            for plan in plans
+        }
 
-        self._moyee_portal_check_access(portal_user=portal_user, access_token=access_token, require_subscription=True)
+    @api.model
+    def _moyee_get_plan_catalog_entry(self, plan):
+        entry = self._moyee_get_plan_catalog(plan._name).get(plan.id)
+        if entry is None:
+            # Plan created in another transaction that has not cleared our cache yet
+            entry = (self._moyee_compute_plan_interval(plan), self._moyee_compute_plan_rank(plan))
+        return entry
 
-        field_name = self._moyee_get_subscription_next_date_field_name()
-        if not field_name:
-            raise UserError(_("This subscription does not expose a next date field."))
+    @api.model
+    def _moyee_get_plan_skip_delta(self, plan):
+        """relativedelta of one billing period of `plan` (one month when unknown)."""
+        if not plan:
+            return relativedelta(months=1)
+        return self._moyee_get_plan_catalog_entry(plan)[0]
 
-        current_date = self[field_name] or fields.Date.today()
-        
-        # Calculate interval to skip
-        plan = self._moyee_get_current_plan_record()
+    @api.model
+    def _moyee_sort_plans(self, plans):
+        """Plans in portal dropdown order (monthly first, then by number of months, weekly last)."""
+        if not plans:
+            return plans
+        return plans.sorted(key=lambda plan: self._moyee_get_plan_catalog_entry(plan)[1])
+
+    @api.model
+    def _moyee_compute_plan_interval(self, plan):
         months = 1  # default fallback
         weeks = 0
         days = 0
@@ -744,13 +961,58 @@ class SaleOrder(models.Model):
                 elif "year" in pname:
                     months = 12
 
-        new_date = current_date + relativedelta(months=months, weeks=weeks, days=days)
+        return relativedelta(months=months, weeks=weeks, days=days)
+
+    @api.model
+    def _moyee_compute_plan_rank(self, plan):
+        name = (plan.display_name or plan.name or "").lower().strip()
+        if name == "monthly" or name == "every month":
+            return 1
+        if "1 month" in name or "one month" in name or "1 monthly" in name:
+            return 2
+        if "2 month" in name or "two month" in name or "2 monthly" in name:
+            return 3
+        if "3 month" in name or "three month" in name or "3 monthly" in name:
+            return 4
+
+        match = re.search(r'(\d+)\s*month', name)
+        if match:
+            try:
+                val = int(match.group(1))
+                return val + 1
+            except ValueError:
+                pass
+
+        if "week" in name:
+            return 10
+
+        seq = getattr(plan, "sequence", 999)
+        return seq
+
+    # ============================================================
+    # ✅ Skip delivery (portal)
+    # ============================================================
+    def moyee_portal_skip_delivery(self, *, portal_user_id, access_token=None):
+        self.ensure_one()
+        portal_user = self.env["res.users"].browse(int(portal_user_id)).exists()
+        if not portal_user:
+            raise AccessError(_("Invalid user."))
+        if not self.env.user.has_group("base.group_user") and portal_user.id != self.env.user.id:
+            raise AccessError(_("You cannot perform actions on behalf of another user."))
+
+        self._moyee_portal_check_access(portal_user=portal_user, access_token=access_token, require_subscription=True)
+
+        field_name = self._moyee_get_subscription_next_date_field_name()
+        if not field_name:
+            raise UserError(_("This subscription does not expose a next date field."))
+
+        current_date = self[field_name] or fields.Date.today()
+        new_date = current_date + self._moyee_get_plan_skip_delta(self._moyee_get_current_plan_record())
 
         self.sudo().write({field_name: new_date})
-        self.with_user(1).message_post(
-            body=_("Moyee: customer skipped next delivery via portal. Next date: %s") % new_date,
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer skipped next delivery via portal. Next date: %s") % new_date,
+            author_partner=portal_user.partner_id,
         )
         return True
 
@@ -765,120 +1027,35 @@ class SaleOrder(models.Model):
         self._moyee_portal_check_access(portal_user=portal_user, access_token=access_token, require_subscription=True)
         self._moyee_set_subscription_paused_state(paused=False)
 
-        self.with_user(1).message_post(
-            body=_("Moyee: customer resumed the subscription via portal."),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer resumed the subscription via portal."),
+            author_partner=portal_user.partner_id,
         )
         return True
 
     # ============================================================
-    # ✅ Cancel / Close (robust)
+    # ✅ Cancel / Close
     # ============================================================
     def _moyee_set_subscription_closed_state(self, reason=None):
         self.ensure_one()
 
-        # Odoo 18 close reason handling
+        vals = {}
         if "close_reason_id" in self._fields:
-            close_reason = False
-            comodel_name = self._fields["close_reason_id"].comodel_name
-            CloseReasonModel = self.env[comodel_name].sudo()
-            if reason:
-                # Try ID lookup first if numeric
-                if isinstance(reason, int) or (isinstance(reason, str) and reason.isdigit()):
-                    close_reason = CloseReasonModel.browse(int(reason)).exists()
-                if not close_reason:
-                    # 1. Search for existing close reason matching the selected reason
-                    close_reason = CloseReasonModel.search([("name", "ilike", reason)], limit=1)
-            
-            # If still no close_reason and we have the field, let's grab the first one as fallback
-            if not close_reason:
-                close_reason = CloseReasonModel.search([], limit=1)
-            
-            if close_reason:
-                try:
-                    self.sudo().write({"close_reason_id": close_reason.id})
-                except Exception as e:
-                    _logger.debug("Moyee: Failed to write close_reason_id: %s", str(e))
-
-        # 1) Try native field writes for subscription_state first (to bypass dummy action_close)
-        if "subscription_state" in self._fields:
-            selection = self._fields["subscription_state"].selection or []
-            keys = [k for k, _lbl in selection]
-            def _pick(candidates):
-                for cand in candidates:
-                    for k in keys:
-                        if k == cand:
-                            return k
-                for cand in candidates:
-                    for k in keys:
-                        if cand in str(k).lower():
-                            return k
-                return None
-            key = _pick(("6_churn", "5_churn", "4_closed", "closed", "cancel", "churned", "churn", "close"))
-            if key:
-                try:
-                    self.sudo().write({"subscription_state": key})
-                    return True
-                except Exception as e:
-                    _logger.debug("Moyee: Failed to write subscription_state: %s", str(e))
-
-        # 2) Try standard methods, but verify they don't just return a wizard action dict
-        for m in ("action_close", "action_cancel", "action_subscription_close", "action_set_to_close"):
-            if hasattr(self, m):
-                try:
-                    res = getattr(self.sudo(), m)()
-                    if res and isinstance(res, dict):
-                        continue
-                    return True
-                except Exception as e:
-                    _logger.debug("Moyee: Failed calling %s: %s", m, str(e))
-
-        # 3) Generic selection field fallback for subscription_status
-        if "subscription_status" in self._fields:
-            selection = self._fields["subscription_status"].selection or []
-            keys = [k for k, _lbl in selection]
-            def _pick(candidates):
-                for cand in candidates:
-                    for k in keys:
-                        if k == cand:
-                            return k
-                for cand in candidates:
-                    for k in keys:
-                        if cand in str(k).lower():
-                            return k
-                return None
-            key = _pick(("closed", "cancel", "churned", "churn", "close"))
-            if key:
-                try:
-                    self.sudo().write({"subscription_status": key})
-                    return True
-                except Exception as e:
-                    _logger.debug("Moyee: Failed writing subscription_status: %s", str(e))
+            close_reason_id = False
+            if reason and (isinstance(reason, int) or (isinstance(reason, str) and reason.isdigit())):
+                close_reason_id = self.env[self._fields["close_reason_id"].comodel_name].sudo().browse(int(reason)).exists().id
+            if not close_reason_id:
+                close_reason_id = self._moyee_get_close_reason_id(reason if isinstance(reason, str) else False)
+            if close_reason_id:
+                vals["close_reason_id"] = close_reason_id
+
+        if self._moyee_apply_state_transition("close", extra_vals=vals):
+            return True
 
-        # 4) stage-based fallback
-        for stage_field in ("subscription_stage_id", "stage_id"):
-            if stage_field in self._fields:
-                Stage = self.env[self._fields[stage_field].comodel_name].sudo()
-                target = (
-                    Stage.search([("name", "ilike", "closed")], limit=1)
-                    or Stage.search([("name", "ilike", "cancel")], limit=1)
-                    or Stage.search([("name", "ilike", "churn")], limit=1)
-                )
-                if target:
-                    try:
-                        self.sudo().write({stage_field: target.id})
-                        return True
-                    except Exception as e:
-                        _logger.debug("Moyee: Failed writing stage_field %s: %s", stage_field, str(e))
-
-        # 5) standard sale.order cancel if nothing else worked
+        # Plain sale.order cancel when no subscription mechanism exists
         if hasattr(self, "action_cancel"):
-            try:
-                self.sudo().action_cancel()
-                return True
-            except Exception as e:
-                _logger.debug("Moyee: Failed action_cancel call: %s", str(e))
+            self.sudo().action_cancel()
+            return True
 
         raise UserError(_("Close/cancel is not available for this subscription implementation."))
 
@@ -895,16 +1072,85 @@ class SaleOrder(models.Model):
 
         body_msg = _("Moyee: customer cancelled/closed the subscription via portal.")
         if reason:
-            body_msg += _("<br/>Reason: %s") % reason
+            body_msg += "\n" + _("Reason: %s") % reason
 
-        self.with_user(1).message_post(
-            body=body_msg,
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            body_msg,
+            author_partner=portal_user.partner_id,
         )
         return True
 
 
+    # ============================================================
+    # Backend mass pause / resume / skip (holiday closures)
+    # ============================================================
+    @api.model
+    def _moyee_mass_action_domain(self, domain, action):
+        """
+        `domain` restricted to confirmed subscriptions in a state `action` applies to:
+        running ones for pause and skip, paused ones for resume.
+        """
+        gate = [("is_subscription_order", "=", True), ("state", "in", ("sale", "done"))]
+        strategy = self._moyee_get_state_strategy("pause" if action == "skip" else action)
+        if strategy and strategy[0] != "method":
+            gate.append((strategy[1], "in", sorted(strategy[3])))
+        return list(domain or []) + gate
+
+    @api.model
+    def _moyee_mass_subscription_action(self, domain, action, pause_until=None, note=None,
+                                        chunk_size=MOYEE_MASS_ACTION_CHUNK_SIZE):
+        """
+        Queue `action` (pause, resume or skip the next delivery) for every subscription
+        matching `domain` whose state allows it. The returned moyee.subscription.mass.job
+        is processed by its cron, `chunk_size` orders per committed batch.
+        """
+        if action not in MOYEE_MASS_ACTIONS:
+            raise UserError(_("Unknown subscription action: %s") % action)
+        return self.env["moyee.subscription.mass.job"]._moyee_submit(
+            self._moyee_mass_action_domain(domain, action),
+            action,
+            pause_until=pause_until,
+            note=note,
+            chunk_size=chunk_size,
+        )
+
+    def _moyee_mass_apply(self, action, pause_until=None):
+        """Apply `action` to these subscriptions; returns {order_id: audit note}."""
+        if not self:
+            return {}
+        next_date_field = self._moyee_get_next_date_field()
+
+        if action == "skip":
+            if not next_date_field:
+                raise UserError(_("This subscription does not expose a next date field."))
+            plan_field = self[:1]._moyee_get_recurring_plan_field_name()
+            groups = self.grouped(plan_field) if plan_field else {False: self}
+            today = fields.Date.today()
+            ids_by_date = defaultdict(list)
+            for plan, orders in groups.items():
+                delta = self._moyee_get_plan_skip_delta(plan)
+                for order in orders:
+                    ids_by_date[(order[next_date_field] or today) + delta].append(order.id)
+            bodies = {}
+            for new_date, ids in ids_by_date.items():
+                self.browse(ids).write({next_date_field: new_date})
+                body = _("Moyee: next delivery skipped in bulk. Next date: %s") % new_date
+                bodies.update(dict.fromkeys(ids, body))
+            return bodies
+
+        extra_vals = {}
+        if action == "pause" and pause_until and next_date_field:
+            extra_vals[next_date_field] = fields.Date.to_date(pause_until)
+        # Orders that are not running (pause) / paused (resume) are skipped, not forced
+        allowed, _already, _rejected = self._moyee_split_state_transition(action)
+        if not self._moyee_apply_state_transition(action, extra_vals=extra_vals, strict=False):
+            raise UserError(_("Pause/resume is not available for this subscription implementation."))
+        if action == "pause":
+            body = _("Moyee: subscription paused in bulk. Next resume date: %s") % (pause_until or _("No change"))
+        else:
+            body = _("Moyee: subscription resumed in bulk.")
+        return dict.fromkeys(allowed.ids, body)
+
     # ============================================================
     # Push next date (portal)
     # ============================================================
@@ -934,10 +1180,9 @@ class SaleOrder(models.Model):
             raise ValidationError(_("The next delivery date cannot be in the past."))
 
         self.sudo().write({field_name: value})
-        self.with_user(1).message_post(
-            body=_("Moyee: customer updated next date via portal (%s).") % field_name,
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer updated next date via portal (%s).") % field_name,
+            author_partner=portal_user.partner_id,
         )
         return True
 
@@ -1083,10 +1328,9 @@ class SaleOrder(models.Model):
         # Automatically recalculate delivery cost for updated order weight
         self._moyee_auto_recompute_delivery()
 
-        self.with_user(1).message_post(
-            body=_("Moyee: customer updated product via portal (%s x %s).") % (product.display_name, qty),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer updated product via portal (%s x %s).") % (product.display_name, qty),
+            author_partner=portal_user.partner_id,
         )
         return True
 
@@ -1141,10 +1385,9 @@ class SaleOrder(models.Model):
             raise UserError(_("Please fill at least one address field."))
 
         self.sudo().write(vals)
-        self.with_user(1).message_post(
-            body=_("Moyee: customer updated full addresses via portal."),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+        self._moyee_queue_note(
+            _("Moyee: customer updated full addresses via portal."),
+            author_partner=portal_user.partner_id,
         )
         return True
 
@@ -1191,12 +1434,11 @@ class SaleOrder(models.Model):
         self._moyee_auto_recompute_delivery()
 
         product_label = line.product_id.display_name if line.product_id else (line.name or _("(no product)"))
-        self.with_user(1).message_post(
-            body=_("Moyee: customer changed quantity via portal — %s: %s → %s.") % (
+        self._moyee_queue_note(
+            _("Moyee: customer changed quantity via portal — %s: %s → %s.") % (
                 product_label, old_qty, qty
             ),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+            author_partner=portal_user.partner_id,
         )
         return True
 
@@ -1208,13 +1450,13 @@ class SaleOrder(models.Model):
                 for l in self.order_line
             )
             if has_invoiced_delivery:
-                self._moyee_auto_recompute_delivery()
+                self._moyee_auto_recompute_delivery(force=True)
                 return True
         try:
             return super().action_open_delivery_wizard()
         except UserError as e:
             if "already invoiced" in str(e).lower() and self._moyee_is_subscription_order():
-                self._moyee_auto_recompute_delivery()
+                self._moyee_auto_recompute_delivery(force=True)
                 return True
             raise
 
@@ -1242,21 +1484,8 @@ class SaleOrder(models.Model):
         if not template:
             raise ValidationError(_("Invalid coffee type selected."))
 
-        variants = self.env["product.product"].sudo().search([
-            ("product_tmpl_id", "=", template.id),
-            ("sale_ok", "=", True),
-        ])
-
-        if not weight and variants:
-            _, t_weight = self.moyee_extract_product_metadata(variants[0])
-            weight = t_weight
-
-        target_product = False
-        for var in variants:
-            v_grind, v_weight = self.moyee_extract_product_metadata(var)
-            if v_grind == grind and v_weight == weight:
-                target_product = var
-                break
+        # (template, grind, weight) -> variant comes from the per-registry index
+        target_product = self.env["product.product"].sudo()._moyee_find_variant(template.id, grind, weight)
 
         if not target_product:
             raise ValidationError(
@@ -1302,15 +1531,96 @@ class SaleOrder(models.Model):
                 line_sudo.write({"product_uom_qty": new_qty})
                 self._moyee_recompute_line_price(line_sudo)
 
-        self.with_user(1).message_post(
-            body=_("Moyee: customer edited line product via portal — %s → %s.") % (
+        # Variant or quantity changes alter the parcel weight
+        self._moyee_auto_recompute_delivery()
+
+        self._moyee_queue_note(
+            _("Moyee: customer edited line product via portal — %s → %s.") % (
                 old_product.display_name, target_product.display_name
             ),
-            subtype_xmlid="mail.mt_note",
-            author_id=portal_user.partner_id.id,
+            author_partner=portal_user.partner_id,
         )
         return True
 
+    # ============================================================
+    # Batch changes (portal JSON API)
+    # ============================================================
+    def _moyee_portal_remove_line(self, *, portal_user_id, line_id, reason=None, access_token=None):
+        self.ensure_one()
+        line = self.env["sale.order.line"].sudo().browse(int(line_id or 0)).exists()
+        if not line or line.order_id.id != self.id:
+            raise ValidationError(_("Invalid subscription line."))
+        return line.action_moyee_soft_remove_portal(portal_user_id=portal_user_id, reason=reason or None, access_token=access_token)
+
+    def moyee_portal_apply_batch(self, *, portal_user_id, operations, access_token=None):
+        """
+        Apply an ordered list of portal operations in one transaction.
+
+        operations: [{"op": "update_qty", "line_id": 12, "qty": 2}, ...]
+        (see MOYEE_PORTAL_BATCH_OPERATIONS). Either every operation is applied
+        or none is; delivery is recomputed once, synchronously, at the end.
+        Returns the updated subscription snapshot.
+        """
+        self.ensure_one()
+        if not isinstance(operations, (list, tuple)) or not operations:
+            raise ValidationError(_("No changes to apply."))
+        if len(operations) > MOYEE_PORTAL_BATCH_MAX_OPERATIONS:
+            raise ValidationError(_("Too many changes at once (maximum %s).") % MOYEE_PORTAL_BATCH_MAX_OPERATIONS)
+
+        with self.env.cr.savepoint():
+            for index, operation in enumerate(operations, start=1):
+                op = isinstance(operation, dict) and operation.get("op")
+                if op not in MOYEE_PORTAL_BATCH_OPERATIONS:
+                    raise ValidationError(_("Change %s: unknown operation %s.") % (index, op))
+                method_name, required, optional = MOYEE_PORTAL_BATCH_OPERATIONS[op]
+                missing = [name for name in required if name not in operation]
+                if missing:
+                    raise ValidationError(_("Change %s (%s): missing %s.") % (index, op, ", ".join(missing)))
+                kwargs = {name: operation[name] for name in required + optional if name in operation}
+                try:
+                    getattr(self, method_name)(portal_user_id=portal_user_id, access_token=access_token, **kwargs)
+                except (UserError, ValueError) as e:
+                    raise ValidationError(_("Change %s (%s): %s") % (index, op, e))
+
+            # The snapshot must show the new total
+            self._moyee_auto_recompute_delivery(force=True)
+
+        return self._moyee_portal_snapshot()
+
+    def _moyee_portal_snapshot(self):
+        """Plain-data view of the subscription returned by the portal JSON API."""
+        self.ensure_one()
+        next_date_field = self._moyee_get_subscription_next_date_field_name()
+        plan = self._moyee_get_current_plan_record()
+        lines = []
+        for line in self.order_line.filtered("x_moyee_is_active_line"):
+            lines.append({
+                "id": line.id,
+                "product_id": line.product_id.id,
+                "name": line.name,
+                "qty": line.product_uom_qty,
+                "price_unit": line.price_unit,
+                "price_subtotal": line.price_subtotal,
+                "price_total": line.price_total,
+                "is_delivery": line._moyee_is_delivery_line(),
+            })
+        snapshot = {
+            "id": self.id,
+            "name": self.name,
+            "currency": self.currency_id.name,
+            "amount_untaxed": self.amount_untaxed,
+            "amount_tax": self.amount_tax,
+            "amount_total": self.amount_total,
+            "next_date": fields.Date.to_string(self[next_date_field]) if next_date_field and self[next_date_field] else False,
+            "plan_id": plan.id if plan else False,
+            "plan_name": plan.display_name if plan else False,
+            "lines": lines,
+        }
+        for fname in ("recurring_amount_untaxed", "recurring_amount_total"):
+            if fname in self._fields:
+                snapshot[fname] = self[fname]
+        return snapshot
+
     # ============================================================
     # Tracking Link Resolver (Monta Integration Safe)
     # ============================================================
@@ -1,7 +1,24 @@
 # File: moyee_subscription_portal_manager/models/sale_order_line.py
 import re
-from odoo import _, api, fields, models
+from collections import defaultdict
+
+from odoo import SUPERUSER_ID, _, api, fields, models
 from odoo.exceptions import AccessError, UserError
+from odoo.tools.sql import column_exists, create_column, create_index
+
+MOYEE_LINE_ROLE_SELECTION = [
+    ("product", "Product"),
+    ("delivery", "Delivery"),
+    ("discount", "Discount"),
+    ("service", "Service"),
+    ("display", "Section / Note"),
+]
+# Roles handled as "delivery" by the portal (never listed, never removable)
+MOYEE_DELIVERY_LINE_ROLES = ("delivery", "service")
+MOYEE_DELIVERY_KEYWORDS = ("delivery", "shipping", "bezorg", "levering", "verzend", "transport", "postnl", "dhl", "ups")
+MOYEE_DISCOUNT_KEYWORDS = ("discount", "promo", "coupon")
+# Classifier weight label -> portal pack size label
+MOYEE_PORTAL_WEIGHT_LABELS = {"1kg": "1 kg", "250g": "250g", "25caps": "25 Capsules"}
 
 
 class SaleOrderLine(models.Model):
@@ -48,6 +65,111 @@ class SaleOrderLine(models.Model):
     x_moyee_removed_on = fields.Datetime(string="Removed On", copy=False)
     x_moyee_removed_by = fields.Many2one("res.users", string="Removed By", copy=False)
     x_moyee_remove_reason = fields.Text(string="Remove Reason", copy=False)
+    x_moyee_is_active_line = fields.Boolean(
+        string="Active Subscription Line",
+        compute="_compute_x_moyee_is_active_line",
+        store=True,
+        index=True,
+        help="Real (non section/note) line that is not soft-removed and still has a quantity.",
+    )
+
+    @api.depends("display_type", "x_moyee_is_removed", "product_uom_qty")
+    def _compute_x_moyee_is_active_line(self):
+        for line in self:
+            line.x_moyee_is_active_line = (
+                not line.display_type
+                and not line.x_moyee_is_removed
+                and float(line.product_uom_qty or 0.0) > 0.0
+            )
+
+    x_moyee_line_role = fields.Selection(
+        MOYEE_LINE_ROLE_SELECTION,
+        string="Moyee Line Role",
+        compute="_compute_x_moyee_line_role",
+        store=True,
+        index=True,
+        help="Classification of the line used by the portal: product, delivery, discount, service or section/note.",
+    )
+
+    def _moyee_line_role_depends(self):
+        depends = ["display_type", "product_id", "price_unit"]
+        if "is_delivery" in self._fields:
+            depends.append("is_delivery")
+        if "reward_id" in self._fields:
+            depends.append("reward_id")
+        return depends
+
+    @api.depends(lambda self: self._moyee_line_role_depends())
+    def _compute_x_moyee_line_role(self):
+        carrier_products = self.env["product.product"]
+        if "delivery.carrier" in self.env:
+            carrier_products = self.env["delivery.carrier"].sudo().with_context(active_test=False).search([]).product_id
+        for line in self:
+            line.x_moyee_line_role = line._moyee_classify_line_role(carrier_products)
+
+    def _moyee_classify_line_role(self, carrier_products):
+        self.ensure_one()
+        if self.display_type:
+            return "display"
+        product = self.product_id
+        pname = (product.display_name or product.name or self.name or "").lower()
+        if (
+            getattr(self, "is_delivery", False)
+            or getattr(product, "is_delivery", False)
+            or (product and product in carrier_products)
+            or any(kw in pname for kw in MOYEE_DELIVERY_KEYWORDS)
+        ):
+            return "delivery"
+        # Service products (discount/reward products included) stay in the
+        # delivery roles, as _moyee_is_delivery_line always treated them
+        if getattr(product, "type", "") == "service" or getattr(product, "detailed_type", "") == "service":
+            return "service"
+        if (
+            getattr(self, "reward_id", False)
+            or float(self.price_unit or 0.0) < 0.0
+            or any(kw in pname for kw in MOYEE_DISCOUNT_KEYWORDS)
+        ):
+            return "discount"
+        return "product"
+
+    def _auto_init(self):
+        # Fill the new column in SQL instead of recomputing every line through the ORM
+        if not column_exists(self.env.cr, self._table, "x_moyee_is_active_line"):
+            create_column(self.env.cr, self._table, "x_moyee_is_active_line", "boolean")
+            self.env.cr.execute(
+                """
+                UPDATE sale_order_line
+                   SET x_moyee_is_active_line = (
+                           display_type IS NULL
+                       AND NOT COALESCE(x_moyee_is_removed, FALSE)
+                       AND COALESCE(product_uom_qty, 0) > 0
+                   )
+                """
+            )
+        return super()._auto_init()
+
+    def init(self):
+        super().init()
+        # Portal and invoicing reads only ever look for the active lines of an order
+        create_index(
+            self.env.cr,
+            "sale_order_line_moyee_active_order_idx",
+            self._table,
+            ["order_id"],
+            where="x_moyee_is_active_line",
+        )
+        # Lines classified before service products took precedence over the discount rules
+        self.env.cr.execute(
+            """
+            UPDATE sale_order_line sol
+               SET x_moyee_line_role = 'service'
+              FROM product_product pp
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE sol.product_id = pp.id
+               AND sol.x_moyee_line_role = 'discount'
+               AND pt.type = 'service'
+            """
+        )
 
     # -----------------------
     # Internal helpers
@@ -60,19 +182,22 @@ class SaleOrderLine(models.Model):
             return "1 kg"
         elif weight == 0.25:
             return "250g"
-        
-        # Try searching name / display name / code
-        lname = (self.product_id.display_name or self.name or "").lower()
-        if "1kg" in lname.replace(" ", "") or "1 kg" in lname:
-            return "1 kg"
-        if "250" in lname:
-            return "250g"
-        if "25" in lname or "capsule" in lname or "cups" in lname:
-            return "25 Capsules"
-        return "—"
+
+        # Then the attribute classifier without its "1kg" default (unlike the stored
+        # x_moyee_weight): unknown sizes display as "—"
+        classifier = self.env["moyee.attribute.classifier"]
+        if self.product_id:
+            label = classifier.moyee_classify_product(self.product_id, use_defaults=False)["weight"]
+        else:
+            label = classifier._moyee_classify_values(display_name=self.name or "", use_defaults=False)["weight"]
+        return MOYEE_PORTAL_WEIGHT_LABELS.get(label, "—")
 
     def _moyee_get_portal_weight_value(self):
         self.ensure_one()
+        if self.product_id:
+            weight = self.product_id._moyee_get_variant_key()[2]
+            if weight:
+                return weight
         disp = self._moyee_get_portal_weight_display()
         if disp == "1 kg":
             return "1kg"
@@ -84,8 +209,9 @@ class SaleOrderLine(models.Model):
 
     def _moyee_get_portal_grind_value(self):
         self.ensure_one()
-        grind, _ = self.order_id.moyee_extract_product_metadata(self.product_id)
-        return grind
+        if not self.product_id:
+            return "other"
+        return self.product_id._moyee_get_variant_key()[1] or "other"
 
     def _moyee_get_portal_grind_display(self):
         self.ensure_one()
@@ -111,19 +237,12 @@ class SaleOrderLine(models.Model):
     def _moyee_is_subscription_line(self):
         """Robust check: treat line as subscription if its order says it is."""
         self.ensure_one()
-        return self.order_id._moyee_is_subscription_order() if self.order_id else False
+        return bool(self.order_id.is_subscription_order)
 
     def _moyee_is_delivery_line(self):
         """Check if line is a delivery, shipping, or service product line."""
         self.ensure_one()
-        pname = (self.product_id.display_name or self.product_id.name or self.name or "").lower()
-        return (
-            getattr(self, 'is_delivery', False)
-            or getattr(self.product_id, 'is_delivery', False)
-            or getattr(self.product_id, 'type', '') == 'service'
-            or getattr(self.product_id, 'detailed_type', '') == 'service'
-            or any(kw in pname for kw in ('delivery', 'shipping', 'bezorg', 'levering', 'verzend', 'transport', 'postnl', 'dhl', 'ups'))
-        )
+        return self.x_moyee_line_role in MOYEE_DELIVERY_LINE_ROLES
 
     def _moyee_block_delivery_product(self):
         """Server-side protection: never allow 'delivery' product removal."""
@@ -149,51 +268,87 @@ class SaleOrderLine(models.Model):
             vals["x_moyee_remove_reason"] = reason
         return vals
 
+    def _moyee_apply_soft_remove(self, removed_by_user, *, reason=None, keep_existing_reason=False,
+                                 note_title=None, author_partner=None, post_as_superuser=False):
+        """
+        Set-based soft remove (callers do the access checks):
+        - one write per distinct (kept quantity, reason) instead of one per line
+        - one (queued) chatter note per order listing every removed item
+        - one delivery recompute request per affected order
+        Returns the affected sale orders.
+        """
+        lines = self.filtered(
+            lambda l: not l.display_type and not (l.x_moyee_is_removed and float(l.product_uom_qty or 0.0) == 0.0)
+        )
+        if not lines:
+            return self.env["sale.order"]
+
+        now = fields.Datetime.now()
+        groups = defaultdict(list)
+        for line in lines:
+            line_reason = (keep_existing_reason and line.x_moyee_remove_reason) or reason
+            groups[(max(float(line.qty_delivered or 0.0), 0.0), line_reason)].append(line.id)
+        for (_qty, line_reason), line_ids in groups.items():
+            group = lines.browse(line_ids)
+            group.write(group[:1]._moyee_soft_remove_vals(removed_by_user.id, reason=line_reason, now=now))
+
+        author = author_partner or (
+            self.env["res.users"].browse(SUPERUSER_ID).partner_id if post_as_superuser else self.env.user.partner_id
+        )
+        for order, order_lines in lines.grouped("order_id").items():
+            # Each line keeps its own reason (keep_existing_reason): report those, not the default
+            reasons = list(dict.fromkeys(line.x_moyee_remove_reason for line in order_lines if line.x_moyee_remove_reason))
+            per_item_reason = len(reasons) > 1
+            items = "\n".join(
+                "- Item: %s%s" % (
+                    line.product_id.display_name if line.product_id else (line.name or _("(no product)")),
+                    " (%s)" % line.x_moyee_remove_reason if per_item_reason and line.x_moyee_remove_reason else "",
+                )
+                for line in order_lines
+            )
+            body = _(
+                "%s\n"
+                "%s\n"
+                "- By: %s\n"
+                "- When: %s\n"
+                "- Reason: %s"
+            ) % (
+                note_title or _("Moyee soft removal applied."),
+                items,
+                removed_by_user.display_name,
+                fields.Datetime.to_string(now),
+                "; ".join(reasons) or _("(no reason provided)"),
+            )
+            order._moyee_queue_note(body, author_partner=author)
+
+        orders = lines.order_id
+        orders._moyee_auto_recompute_delivery()
+        return orders
+
     # -----------------------
     # Backend action (employees)
     # -----------------------
     def action_moyee_soft_remove(self, reason=None):
         """
-        Soft remove a subscription product line:
+        Soft remove subscription product lines (also used by the
+        "Soft Remove from Subscription" server action on line selections):
         - product_uom_qty = 0
         - x_moyee_is_removed = True
         - track who/when/why
-        - post a chatter note on the sale order
+        - post one chatter note per sale order
         """
         self._moyee_check_manager_rights()
         self._moyee_block_delivery_product()
 
-        now = fields.Datetime.now()
         for line in self:
-            if line.display_type:
-                continue
-
-            if not line._moyee_is_subscription_line():
+            if not line.display_type and not line._moyee_is_subscription_line():
                 raise UserError(_("This action is only available on subscription sale orders."))
 
-            if line.x_moyee_is_removed and float(line.product_uom_qty or 0.0) == 0.0:
-                continue
-
-            vals = line._moyee_soft_remove_vals(self.env.user.id, reason=reason, now=now)
-            line.write(vals)
-
-            product_label = line.product_id.display_name if line.product_id else (line.name or _("(no product)"))
-            body = _(
-                "Moyee soft removal applied.\n"
-                "- Item: %s\n"
-                "- Action: quantity set to 0, line marked as removed\n"
-                "- By: %s\n"
-                "- When: %s\n"
-                "- Reason: %s"
-            ) % (
-                product_label,
-                self.env.user.display_name,
-                fields.Datetime.to_string(now),
-                reason or _("(no reason provided)"),
-            )
-            line.order_id.message_post(body=body, subtype_xmlid="mail.mt_note")
-            line.order_id._moyee_auto_recompute_delivery()
-
+        self._moyee_apply_soft_remove(
+            self.env.user,
+            reason=reason,
+            note_title=_("Moyee soft removal applied (quantity set to 0, line marked as removed)."),
+        )
         return True
 
     # -----------------------
@@ -209,45 +364,65 @@ class SaleOrderLine(models.Model):
         if not self.env.user.has_group("base.group_user") and portal_user.id != self.env.user.id:
             raise AccessError(_("You cannot perform actions on behalf of another user."))
 
-        # Ownership / access check (uses your sale.order helper)
-        for line in self:
-            if not line.order_id:
-                raise UserError(_("Invalid subscription line."))
-            line.order_id._moyee_portal_check_access(portal_user=portal_user, access_token=access_token, require_subscription=True)
-
-        now = fields.Datetime.now()
-        for line in self:
-            if line.display_type:
-                continue
-            if line.x_moyee_is_removed and float(line.product_uom_qty or 0.0) == 0.0:
-                continue
-
-            vals = line._moyee_soft_remove_vals(portal_user.id, reason=reason, now=now)
-            line.sudo().write(vals)
-
-            product_label = line.product_id.display_name if line.product_id else (line.name or _("(no product)"))
-            body = _(
-                "Moyee soft removal applied via portal.\n"
-                "- Item: %s\n"
-                "- By: %s\n"
-                "- When: %s\n"
-                "- Reason: %s"
-            ) % (
-                product_label,
-                portal_user.display_name,
-                fields.Datetime.to_string(now),
-                reason or _("(no reason provided)"),
-            )
-
-            line.order_id.with_user(1).message_post(
-                body=body,
-                subtype_xmlid="mail.mt_note",
-                author_id=portal_user.partner_id.id,
-            )
-            line.order_id._moyee_auto_recompute_delivery()
-
+        # Ownership / access check (uses your sale.order helper), once per order
+        if any(not line.order_id for line in self):
+            raise UserError(_("Invalid subscription line."))
+        for order in self.order_id:
+            order._moyee_portal_check_access(portal_user=portal_user, access_token=access_token, require_subscription=True)
+
+        self.sudo()._moyee_apply_soft_remove(
+            portal_user,
+            reason=reason,
+            note_title=_("Moyee soft removal applied via portal."),
+            author_partner=portal_user.partner_id,
+            post_as_superuser=True,
+        )
         return True
 
+    # -----------------------
+    # Archive (moyee.subscription.line.archive)
+    # -----------------------
+    def _moyee_archive_lines(self):
+        """
+        Move soft-removed lines into moyee.subscription.line.archive and delete them.
+        The archive row keeps the line's invoice lines, so the order still lists
+        its invoices once the sale_line_ids links are gone.
+        Lines with stock moves still in progress are kept for a later run.
+        Returns the created archive records.
+        """
+        lines = self.filtered(lambda l: l.x_moyee_is_removed and not l.display_type)
+        if "move_ids" in self._fields:
+            lines = lines.filtered(lambda l: all(m.state in ("done", "cancel") for m in l.move_ids))
+        if not lines:
+            return self.env["moyee.subscription.line.archive"]
+
+        archives = self.env["moyee.subscription.line.archive"].sudo().create([{
+            "order_id": line.order_id.id,
+            "company_id": line.company_id.id,
+            "line_id": line.id,
+            "product_id": line.product_id.id,
+            "name": line.name,
+            "product_uom_qty": line.product_uom_qty,
+            "qty_delivered": line.qty_delivered,
+            "qty_invoiced": line.qty_invoiced,
+            "price_unit": line.price_unit,
+            "price_subtotal": line.price_subtotal,
+            "currency_id": line.currency_id.id,
+            "removed_on": line.x_moyee_removed_on,
+            "removed_by": line.x_moyee_removed_by.id,
+            "remove_reason": line.x_moyee_remove_reason,
+            "invoice_line_ids": [(6, 0, line.invoice_lines.ids)],
+        } for line in lines])
+        lines.sudo().with_context(moyee_archive_lines=True).unlink()
+        return archives
+
+    def _check_line_unlink(self):
+        lines = super()._check_line_unlink()
+        if self.env.context.get("moyee_archive_lines"):
+            # Removed lines are archived with their invoice links; anything else keeps the standard guard
+            lines = lines.filtered(lambda l: not l.x_moyee_is_removed)
+        return lines
+
     # -----------------------
     # Convert backend "trash" into soft remove for subscriptions
     # -----------------------
@@ -256,6 +431,9 @@ class SaleOrderLine(models.Model):
         If user clicks the default trash icon on confirmed subscription lines,
         convert unlink() into soft-remove instead of error.
         """
+        if self.env.context.get("moyee_archive_lines"):
+            return super().unlink()
+
         # only subscription lines on confirmed orders
         to_soft_remove = self.filtered(
             lambda l: (
@@ -270,23 +448,13 @@ class SaleOrderLine(models.Model):
             self._moyee_check_manager_rights()
             to_soft_remove._moyee_block_delivery_product()
 
-            now = fields.Datetime.now()
-            for line in to_soft_remove:
-                # write as employee user
-                line.write(
-                    line._moyee_soft_remove_vals(
-                        self.env.user.id,
-                        reason=line.x_moyee_remove_reason
-                        or _("Removed via line delete (auto converted to soft remove)."),
-                        now=now,
-                    )
-                )
-
-                product_label = line.product_id.display_name if line.product_id else (line.name or _("(no product)"))
-                line.order_id.message_post(
-                    body=_("Moyee: '%s' was removed (delete action converted to soft remove).") % product_label,
-                    subtype_xmlid="mail.mt_note",
-                )
+            # write as employee user
+            to_soft_remove._moyee_apply_soft_remove(
+                self.env.user,
+                reason=_("Removed via line delete (auto converted to soft remove)."),
+                keep_existing_reason=True,
+                note_title=_("Moyee: delete action converted to soft remove."),
+            )
 
         remaining = self - to_soft_remove
         if remaining:
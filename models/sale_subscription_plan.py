@@ -0,0 +1,44 @@
+# File: moyee_subscription_portal_manager/models/sale_subscription_plan.py
+from odoo import api, models
+
+
+# Plan fields read by the plan catalog (interval, rank) and the per-company plan lists
+MOYEE_PLAN_CACHE_FIELDS = {
+    "name",
+    "sequence",
+    "active",
+    "company_id",
+    "billing_period_value",
+    "billing_period_unit",
+    "optional_plans",
+    "optional_plan_ids",
+    "optional_recurring_plan_ids",
+    "optional_recurring_plans",
+}
+
+
+class SaleSubscriptionPlan(models.Model):
+    _inherit = "sale.subscription.plan"
+
+    # ============================================================
+    # sale.order memoizes every plan's interval and portal sort rank
+    # (_moyee_get_plan_catalog) and the per-company plan lists
+    # (_moyee_get_company_plan_ids / _moyee_get_changeable_plan_index)
+    # in the dedicated "plans" cache
+    # ============================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        plans = super().create(vals_list)
+        self.env["moyee.cache"]._moyee_clear("plans")
+        return plans
+
+    def write(self, vals):
+        res = super().write(vals)
+        if MOYEE_PLAN_CACHE_FIELDS.intersection(vals):
+            self.env["moyee.cache"]._moyee_clear("plans")
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["moyee.cache"]._moyee_clear("plans")
+        return res
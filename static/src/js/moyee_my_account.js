@@ -1,10 +1,11 @@
 /** @odoo-module **/
 
 import publicWidget from "@web/legacy/js/public/public_widget";
+import { rpc } from "@web/core/network/rpc";
 
 /**
  * Moyee My Account Page — interactivity widget.
- * Handles FAQ accordion, order/invoice expand, modals, smooth scroll, and TAF.
+ * Handles lazy sections, FAQ accordion, order/invoice load more, modals, smooth scroll, and TAF.
  */
 publicWidget.registry.MoyeeMyAccountPage = publicWidget.Widget.extend({
     selector: ".moyee-account-page",
@@ -12,15 +13,8 @@ publicWidget.registry.MoyeeMyAccountPage = publicWidget.Widget.extend({
         /* FAQ accordion */
         "click .moyee-faq-q": "_onFaqToggle",
 
-        /* Expand / collapse/paginate orders & invoices */
-        "click .moyee-orders-toggle": "_onToggleOrders",
-        "click .moyee-invoices-toggle": "_onToggleInvoices",
-        "click .js-prev-orders-page": "_onPrevOrdersPage",
-        "click .js-next-orders-page": "_onNextOrdersPage",
-        "click .js-orders-show-less": "_onOrdersShowLess",
-        "click .js-prev-invoices-page": "_onPrevInvoicesPage",
-        "click .js-next-invoices-page": "_onNextInvoicesPage",
-        "click .js-invoices-show-less": "_onInvoicesShowLess",
+        /* Load more orders & invoices */
+        "click .js-moyee-load-more": "_onLoadMore",
         "click .moyee-reorder-btn": "_onReorderClick",
 
         /* Modals */
@@ -51,11 +45,8 @@ publicWidget.registry.MoyeeMyAccountPage = publicWidget.Widget.extend({
     // ──────────────────────────────────────────
 
     start: function () {
-        this._ordersExpanded = false;
-        this._invoicesExpanded = false;
-        this._ordersPage = 1;
-        this._invoicesPage = 1;
-        this._pageSize = 10;
+        this._sectionPromises = {};
+        this._catalogVariants = [];
 
         // Exit early if not on a Moyee portal page or modal container
         if (!this.$(".moyee-portal-container").length && !this.$(".moyee-sub-card").length && !this.$("[data-moyee-modal]").length) {
@@ -68,166 +59,122 @@ publicWidget.registry.MoyeeMyAccountPage = publicWidget.Widget.extend({
             $postOpt.remove();
         }
 
+        this._initLazySections();
+
         return this._super.apply(this, arguments);
     },
 
-    // ──────────────────────────────────────────
-    // FAQ Accordion
-    // ──────────────────────────────────────────
-
-    _onFaqToggle: function (ev) {
-        var $item = $(ev.currentTarget).closest(".moyee-faq-item");
-        $item.toggleClass("open");
+    destroy: function () {
+        if (this._lazyObserver) {
+            this._lazyObserver.disconnect();
+        }
+        this._super.apply(this, arguments);
     },
 
     // ──────────────────────────────────────────
-    // Orders / Invoices client-side pagination
+    // Lazy sections (orders, invoices, FAQ, brew guides, catalog)
     // ──────────────────────────────────────────
 
-    _onToggleOrders: function (ev) {
-        ev.preventDefault();
-        this._ordersExpanded = true;
-        this._ordersPage = 1;
-        this._updateOrdersView();
-    },
-
-    _onPrevOrdersPage: function (ev) {
-        ev.preventDefault();
-        if (this._ordersPage > 1) {
-            this._ordersPage--;
-            this._updateOrdersView();
-            var $target = this.$("#moyee-section-orders");
-            if ($target.length) {
-                $target[0].scrollIntoView({ behavior: "smooth" });
-            }
+    _initLazySections: function () {
+        var self = this;
+        var $sections = this.$(".js-moyee-lazy-section").not("[data-moyee-lazy='manual']");
+        if (!$sections.length) {
+            return;
         }
-    },
-
-    _onNextOrdersPage: function (ev) {
-        ev.preventDefault();
-        var total = this.$(".js-order-item").length;
-        var totalPages = Math.ceil(total / this._pageSize) || 1;
-        if (this._ordersPage < totalPages) {
-            this._ordersPage++;
-            this._updateOrdersView();
-            var $target = this.$("#moyee-section-orders");
-            if ($target.length) {
-                $target[0].scrollIntoView({ behavior: "smooth" });
-            }
+        if (!("IntersectionObserver" in window)) {
+            $sections.each(function () {
+                self._loadSection($(this).data("moyee-section"));
+            });
+            return;
         }
+        this._lazyObserver = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    self._lazyObserver.unobserve(entry.target);
+                    self._loadSection($(entry.target).data("moyee-section"));
+                }
+            });
+        }, { rootMargin: "300px 0px" });
+        $sections.each(function () {
+            self._lazyObserver.observe(this);
+        });
     },
 
-    _onOrdersShowLess: function (ev) {
-        ev.preventDefault();
-        this._ordersExpanded = false;
-        this._updateOrdersView();
-        var $target = this.$("#moyee-section-orders");
-        if ($target.length) {
-            $target[0].scrollIntoView({ behavior: "smooth" });
+    _loadSection: function (section) {
+        var self = this;
+        if (this._sectionPromises[section]) {
+            return this._sectionPromises[section];
         }
-    },
-
-    _updateOrdersView: function () {
-        var $items = this.$(".js-order-item");
-        var total = $items.length;
-        if (!this._ordersExpanded) {
-            $items.each(function (idx) {
-                $(this).toggle(idx < 5);
-            });
-            this.$(".js-orders-toggle-wrap").removeClass("d-none");
-            this.$(".js-orders-pagination").removeClass("d-flex").addClass("d-none");
-        } else {
-            this.$(".js-orders-toggle-wrap").addClass("d-none");
-            this.$(".js-orders-pagination").removeClass("d-none").addClass("d-flex");
-
-            var totalPages = Math.ceil(total / this._pageSize) || 1;
-            if (this._ordersPage < 1) this._ordersPage = 1;
-            if (this._ordersPage > totalPages) this._ordersPage = totalPages;
-
-            var startIdx = (this._ordersPage - 1) * this._pageSize;
-            var endIdx = startIdx + this._pageSize;
-
-            $items.each(function (idx) {
-                $(this).toggle(idx >= startIdx && idx < endIdx);
-            });
-
-            this.$(".js-orders-page-info").text("Page " + this._ordersPage + " of " + totalPages);
-            this.$(".js-prev-orders-page").prop("disabled", this._ordersPage === 1);
-            this.$(".js-next-orders-page").prop("disabled", this._ordersPage === totalPages);
+        var $container = this.$(".js-moyee-lazy-section[data-moyee-section='" + section + "']");
+        if (!$container.length) {
+            return Promise.resolve();
         }
+        var params = {};
+        var subId = $container.data("moyee-sub-id");
+        if (subId) {
+            params.sub_id = subId;
+        }
+        this._sectionPromises[section] = rpc("/my/moyee/section/" + section, params).then(function (result) {
+            $container.html(result.html || "");
+            if (result.variants) {
+                self._catalogVariants = result.variants;
+            }
+            $container.trigger("moyee:section-loaded", [section]);
+        }).catch(function (err) {
+            console.error("Moyee error loading section " + section + ":", err);
+            // Allow a retry the next time the section is requested
+            delete self._sectionPromises[section];
+            $container.find(".moyee-lazy-loading").text("Could not load this section. Please refresh the page.");
+        });
+        return this._sectionPromises[section];
     },
 
-    _onToggleInvoices: function (ev) {
-        ev.preventDefault();
-        this._invoicesExpanded = true;
-        this._invoicesPage = 1;
-        this._updateInvoicesView();
-    },
+    // ──────────────────────────────────────────
+    // FAQ Accordion
+    // ──────────────────────────────────────────
 
-    _onPrevInvoicesPage: function (ev) {
-        ev.preventDefault();
-        if (this._invoicesPage > 1) {
-            this._invoicesPage--;
-            this._updateInvoicesView();
-            var $target = this.$("#moyee-section-invoices");
-            if ($target.length) {
-                $target[0].scrollIntoView({ behavior: "smooth" });
-            }
-        }
+    _onFaqToggle: function (ev) {
+        var $item = $(ev.currentTarget).closest(".moyee-faq-item");
+        $item.toggleClass("open");
     },
 
-    _onNextInvoicesPage: function (ev) {
-        ev.preventDefault();
-        var total = this.$(".js-invoice-item").length;
-        var totalPages = Math.ceil(total / this._pageSize) || 1;
-        if (this._invoicesPage < totalPages) {
-            this._invoicesPage++;
-            this._updateInvoicesView();
-            var $target = this.$("#moyee-section-invoices");
-            if ($target.length) {
-                $target[0].scrollIntoView({ behavior: "smooth" });
-            }
-        }
-    },
+    // ──────────────────────────────────────────
+    // Orders / Invoices "load more" (keyset cursor)
+    // ──────────────────────────────────────────
 
-    _onInvoicesShowLess: function (ev) {
+    _onLoadMore: function (ev) {
         ev.preventDefault();
-        this._invoicesExpanded = false;
-        this._updateInvoicesView();
-        var $target = this.$("#moyee-section-invoices");
-        if ($target.length) {
-            $target[0].scrollIntoView({ behavior: "smooth" });
+        var self = this;
+        var $btn = $(ev.currentTarget);
+        var section = $btn.data("moyee-section");
+        var cursor = $btn.attr("data-moyee-cursor");
+        if (!cursor || $btn.prop("disabled")) {
+            return;
         }
-    },
-
-    _updateInvoicesView: function () {
-        var $items = this.$(".js-invoice-item");
-        var total = $items.length;
-        if (!this._invoicesExpanded) {
-            $items.each(function (idx) {
-                $(this).toggle(idx < 3);
-            });
-            this.$(".js-invoices-toggle-wrap").removeClass("d-none");
-            this.$(".js-invoices-pagination").removeClass("d-flex").addClass("d-none");
-        } else {
-            this.$(".js-invoices-toggle-wrap").addClass("d-none");
-            this.$(".js-invoices-pagination").removeClass("d-none").addClass("d-flex");
-
-            var totalPages = Math.ceil(total / this._pageSize) || 1;
-            if (this._invoicesPage < 1) this._invoicesPage = 1;
-            if (this._invoicesPage > totalPages) this._invoicesPage = totalPages;
-
-            var startIdx = (this._invoicesPage - 1) * this._pageSize;
-            var endIdx = startIdx + this._pageSize;
-
-            $items.each(function (idx) {
-                $(this).toggle(idx >= startIdx && idx < endIdx);
-            });
-
-            this.$(".js-invoices-page-info").text("Page " + this._invoicesPage + " of " + totalPages);
-            this.$(".js-prev-invoices-page").prop("disabled", this._invoicesPage === 1);
-            this.$(".js-next-invoices-page").prop("disabled", this._invoicesPage === totalPages);
+        var $container = this.$(".js-moyee-lazy-section[data-moyee-section='" + section + "']");
+        var params = { cursor: cursor };
+        var subId = $container.data("moyee-sub-id");
+        if (subId) {
+            params.sub_id = subId;
         }
+        $btn.prop("disabled", true);
+        rpc("/my/moyee/section/" + section, params).then(function (result) {
+            var $list = self.$(".js-moyee-page-list[data-moyee-section='" + section + "']");
+            var $page = $("<div/>").html(result.html || "");
+            $list.append($page.children());
+            var shown = $list.children(".js-order-item, .js-invoice-item").length;
+            self.$(".js-moyee-load-more-wrap[data-moyee-section='" + section + "'] .js-moyee-shown-count").text(shown);
+            if (result.next_cursor) {
+                $btn.attr("data-moyee-cursor", result.next_cursor);
+            } else {
+                $btn.attr("data-moyee-cursor", "");
+                $btn.closest(".js-moyee-load-more-wrap").addClass("d-none");
+            }
+        }).catch(function (err) {
+            console.error("Moyee error loading more " + section + ":", err);
+        }).finally(function () {
+            $btn.prop("disabled", false);
+        });
     },
 
     _onReorderClick: function (ev) {
@@ -250,10 +197,19 @@ publicWidget.registry.MoyeeMyAccountPage = publicWidget.Widget.extend({
             $modal.addClass("open");
             $("body").css("overflow", "hidden");
 
+            if (modalId === "moyee-modal-products-add") {
+                this._loadSection("catalog");
+            }
+
             // If this is an edit product modal, initialize the cascading dropdowns
+            // once the catalog variants have been fetched
             var $form = $modal.find(".js_moyee_edit_line_form");
             if ($form.length) {
-                this._initCascadingDropdowns($form);
+                var self = this;
+                this._loadSection("catalog").then(function () {
+                    $form.attr("data-variants", JSON.stringify(self._catalogVariants || []));
+                    self._initCascadingDropdowns($form);
+                });
             }
         }
     },
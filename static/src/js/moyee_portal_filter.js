@@ -10,6 +10,7 @@ publicWidget.registry.MoyeeProductFilter = publicWidget.Widget.extend({
         'change #moyeeSameAsShipping': '_onSameAsShipping',
         'input [name^="ship_"], select[name^="ship_"]': '_onShipAddressChange',
         'click input[type="date"]': '_onDateInputClick',
+        'moyee:section-loaded': '_onSectionLoaded',
     },
 
     /**
@@ -45,6 +46,17 @@ publicWidget.registry.MoyeeProductFilter = publicWidget.Widget.extend({
         this._applyFilters();
     },
 
+    _onSectionLoaded: function (ev, section) {
+        // The "Add product" catalog is rendered lazily by moyee_my_account.js
+        if (section !== "catalog") {
+            return;
+        }
+        this.$noResults = this.$("#moyeeNoResults");
+        this.$slider = this.$("#moyeeProductSlider");
+        this._updateFilterStates();
+        this._applyFilters();
+    },
+
     _onClearFilters: function (ev) {
         ev.preventDefault();
         this.$(".moyee-filter-check").prop("checked", false);
@@ -0,0 +1,11 @@
+# File: moyee_subscription_portal_manager/tests/__init__.py
+from . import test_moyee_perf
+from . import test_moyee_benchmark
+from . import test_moyee_attribute_classifier
+from . import test_moyee_invoicing
+from . import test_moyee_line_archive
+from . import test_moyee_line_role
+from . import test_moyee_state_transition
+from . import test_moyee_mass_action
+from . import test_moyee_portal_access
+from . import test_moyee_subscription_note
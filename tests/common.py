@@ -0,0 +1,56 @@
+# File: moyee_subscription_portal_manager/tests/common.py
+from odoo.tests.common import TransactionCase
+
+
+class MoyeeSubscriptionCase(TransactionCase):
+    """Builds confirmed synthetic subscriptions with section, delivery and soft-removed lines."""
+
+    @classmethod
+    def _moyee_make_subscriptions(cls, subscriptions, lines, removed_share=0.0, delivery_share=0.0, display_share=0.0):
+        env = cls.env
+        SaleOrder = env["sale.order"]
+        Product = env["product.product"]
+
+        cls.partner = env["res.partner"].create({"name": "Moyee Test Customer"})
+        product_vals = {"type": "consu", "list_price": 12.5, "sale_ok": True}
+        if "recurring_invoice" in Product._fields:
+            product_vals["recurring_invoice"] = True
+        products = Product.create([
+            dict(product_vals, name="Moyee Test Coffee %s" % i) for i in range(max(lines, 1))
+        ])
+        delivery_product = Product.create({"name": "Moyee Test Shipping", "type": "service", "list_price": 4.95})
+
+        plan_vals = {}
+        if "plan_id" in SaleOrder._fields:
+            plan_model = SaleOrder._fields["plan_id"].comodel_name
+            cls.plan = env[plan_model].create({"name": "Moyee Test Monthly"})
+            plan_vals["plan_id"] = cls.plan.id
+
+        n_display = int(round(lines * display_share))
+        n_delivery = int(round(lines * delivery_share))
+        n_removed = int(round(lines * removed_share))
+        n_products = max(lines - n_display - n_delivery, 1)
+
+        order_vals = []
+        for index in range(subscriptions):
+            commands = []
+            for i in range(n_display):
+                commands.append((0, 0, {"display_type": "line_section", "name": "Section %s" % i}))
+            for i in range(n_products):
+                commands.append((0, 0, {"product_id": products[(index + i) % len(products)].id, "product_uom_qty": 1 + i % 3}))
+            for _i in range(n_delivery):
+                delivery_vals = {"product_id": delivery_product.id, "product_uom_qty": 1.0}
+                if "is_delivery" in env["sale.order.line"]._fields:
+                    delivery_vals["is_delivery"] = True
+                commands.append((0, 0, delivery_vals))
+            order_vals.append(dict(plan_vals, partner_id=cls.partner.id, order_line=commands))
+
+        orders = SaleOrder.create(order_vals)
+        orders.action_confirm()
+
+        if n_removed:
+            to_remove = env["sale.order.line"]
+            for order in orders:
+                to_remove |= order._moyee_get_sub_lines()[:n_removed]
+            to_remove.write({"x_moyee_is_removed": True, "product_uom_qty": 0.0})
+        return orders
@@ -0,0 +1,29 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_attribute_classifier.py
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeAttributeClassifier(TransactionCase):
+
+    def test_no_default_mode_leaves_unknown_dimensions_empty(self):
+        Classifier = self.env["moyee.attribute.classifier"]
+        self.assertEqual(Classifier._moyee_classify_values(name="Moyee Blend")["weight"], "1kg")
+        result = Classifier._moyee_classify_values(name="Moyee Blend", use_defaults=False)
+        self.assertEqual(result, {"grind": "", "weight": "", "bold": "", "fruity": ""})
+
+    def test_portal_weight_display(self):
+        Product = self.env["product.product"]
+        Line = self.env["sale.order.line"]
+        expected = {
+            "Moyee Blend 1 kg": "1 kg",
+            "Moyee Blend 250 g": "250g",
+            "Moyee Blend 25 capsules": "25 Capsules",
+            # Unknown sizes: no "25" substring match on a vintage
+            "Moyee Blend 2025": "—",
+            "Moyee Gift Card": "—",
+        }
+        for name, label in expected.items():
+            product = Product.create({"name": name, "type": "consu"})
+            line = Line.new({"product_id": product.id, "name": name})
+            self.assertEqual(line._moyee_get_portal_weight_display(), label, name)
+            self.assertEqual(Line.new({"name": name})._moyee_get_portal_weight_display(), label, name)
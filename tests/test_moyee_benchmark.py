@@ -0,0 +1,172 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_benchmark.py
+import json
+import logging
+import os
+import tempfile
+import time
+
+from odoo import fields, release
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import config
+
+from ..models.moyee_attribute_classifier import MOYEE_CLASSIFIER_RULES, _moyee_compile_classifier_rules
+from .common import MoyeeSubscriptionCase
+
+_logger = logging.getLogger(__name__)
+
+# Defaults of the benchmark parameters. Each one can be overridden by the
+# MOYEE_BENCHMARK_<NAME> environment variable or by moyee_benchmark_<name>
+# in the Odoo configuration file, e.g. moyee_benchmark_subscriptions = 500.
+MOYEE_BENCHMARK_DEFAULTS = {
+    "subscriptions": 100,
+    "lines": 10,
+    "removed_share": 0.2,
+    "delivery_share": 0.1,
+    "display_share": 0.1,
+    "report_path": os.path.join(tempfile.gettempdir(), "moyee_invoicing_benchmark.json"),
+}
+
+
+def _moyee_benchmark_param(name):
+    default = MOYEE_BENCHMARK_DEFAULTS[name]
+    value = os.environ.get("MOYEE_BENCHMARK_%s" % name.upper()) or config.get("moyee_benchmark_%s" % name)
+    if value in (None, ""):
+        return default
+    return type(default)(value)
+
+
+@tagged("post_install", "-at_install", "-standard", "moyee_benchmark")
+class TestMoyeeInvoicingBenchmark(MoyeeSubscriptionCase):
+    """
+    Times the recurring invoicing pipeline on N subscriptions x M lines and writes
+    the timings and query counts to a JSON report, to compare releases before the
+    month-end run. Not part of the standard run: --test-tags moyee_benchmark.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.params = {name: _moyee_benchmark_param(name) for name in MOYEE_BENCHMARK_DEFAULTS}
+        cls.orders = cls._moyee_make_subscriptions(
+            cls.params["subscriptions"], cls.params["lines"],
+            removed_share=cls.params["removed_share"],
+            delivery_share=cls.params["delivery_share"],
+            display_share=cls.params["display_share"],
+        )
+
+    def _moyee_measure(self, func):
+        """Run func once on a cold record cache; returns (its result, {"seconds", "queries"})."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries_before = self.cr.sql_log_count
+        start = time.perf_counter()
+        value = func()
+        self.env.flush_all()
+        seconds = time.perf_counter() - start
+        return value, {"seconds": seconds, "queries": self.cr.sql_log_count - queries_before}
+
+    def test_invoicing_benchmark(self):
+        orders = self.orders
+        report = {
+            "benchmark": "moyee_recurring_invoicing",
+            "date": fields.Datetime.to_string(fields.Datetime.now()),
+            "database": self.cr.dbname,
+            "odoo_version": release.version,
+            "module_version": self.env["ir.module.module"].search(
+                [("name", "=", "moyee_subscription_portal_manager")], limit=1,
+            ).latest_version,
+            "params": {name: value for name, value in self.params.items() if name != "report_path"},
+            "dataset": {
+                "orders": len(orders),
+                "lines": len(orders.order_line),
+                "removed_lines": len(orders.order_line.filtered("x_moyee_is_removed")),
+                "display_lines": len(orders.order_line.filtered("display_type")),
+            },
+            "timings": {},
+        }
+        timings = report["timings"]
+
+        invoiceable, timings["get_invoiceable_lines"] = self._moyee_measure(lambda: orders._get_invoiceable_lines())
+        report["dataset"]["invoiceable_lines"] = len(invoiceable)
+
+        invoices, timings["create_invoices"] = self._moyee_measure(lambda: orders._create_invoices())
+        self.assertTrue(invoices)
+        report["dataset"]["invoices"] = len(invoices)
+        report["dataset"]["invoice_lines"] = len(invoices.invoice_line_ids)
+
+        _posted, timings["post_invoices"] = self._moyee_measure(lambda: invoices.action_post())
+
+        # The invoice report applies the removed/zero-quantity line filter of reports/report_invoice.xml
+        Report = self.env["ir.actions.report"]
+        if Report.get_wkhtmltopdf_state() == "ok":
+            report["report_format"] = "pdf"
+            (content, _format), timings["render_invoice_report"] = self._moyee_measure(
+                lambda: Report.with_context(force_report_rendering=True)._render_qweb_pdf("account.account_invoices", invoices.ids)
+            )
+        else:
+            # Without wkhtmltopdf only the QWeb part of the rendering is timed
+            report["report_format"] = "html"
+            (content, _format), timings["render_invoice_report"] = self._moyee_measure(
+                lambda: Report._render_qweb_html("account.account_invoices", invoices.ids)
+            )
+        self.assertTrue(content)
+
+        for timing in timings.values():
+            timing["per_subscription_ms"] = timing["seconds"] / len(orders) * 1000.0
+
+        with open(self.params["report_path"], "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+        _logger.info(
+            "Moyee invoicing benchmark (%s subscriptions x %s lines, report %s): %s",
+            len(orders), self.params["lines"], self.params["report_path"],
+            ", ".join("%s %.3fs/%s queries" % (name, t["seconds"], t["queries"]) for name, t in timings.items()),
+        )
+
+
+@tagged("post_install", "-at_install", "-standard", "moyee_benchmark")
+class TestMoyeeClassifierBenchmark(TransactionCase):
+    """Classifies a synthetic catalog of 10k variants (plain data, no records)."""
+
+    def test_classifier_benchmark(self):
+        size = 10000
+        grinds = ("Whole beans", "Hele bonen", "Filter grind", "Filtermaling", "Espresso", "Capsules")
+        weights = ("1 kg", "1000 g", "250 g", "0.25 kg", "25 capsules")
+        roasts = ("Light", "Medium", "Dark", "Mild", "Intens")
+        flavours = ("Full", "Fruity", "Vol", "Fruitig")
+        grind_attrs = ("Grind", "Maling", "How do you brew?", "Hoe zet je je koffie?")
+        weight_attrs = ("Weight", "Gewicht", "Size", "Inhoud")
+
+        catalog = []
+        for i in range(size):
+            variant_values = [
+                (grind_attrs[i % len(grind_attrs)], grinds[i % len(grinds)]),
+                (weight_attrs[i % len(weight_attrs)], weights[(i // 7) % len(weights)]),
+                ("How bold?" if i % 2 else "Sterkte", roasts[(i // 3) % len(roasts)]),
+            ]
+            template_lines = [("Full or fruity?" if i % 2 else "Smaak", list(flavours))]
+            name = "Moyee Coffee %d" % (i % 50)
+            catalog.append((variant_values, template_lines, "%s (%s)" % (name, variant_values[0][1]), name))
+
+        # Time a fresh compilation without dropping the (registry-wide) ormcache
+        start = time.perf_counter()
+        _moyee_compile_classifier_rules()
+        compile_seconds = time.perf_counter() - start
+
+        Classifier = self.env["moyee.attribute.classifier"]
+        distribution = {dimension: {} for dimension in MOYEE_CLASSIFIER_RULES}
+        start = time.perf_counter()
+        for variant_values, template_lines, display_name, name in catalog:
+            result = Classifier._moyee_classify_values(variant_values, template_lines, display_name, name)
+            for dimension, label in result.items():
+                distribution[dimension][label] = distribution[dimension].get(label, 0) + 1
+        seconds = time.perf_counter() - start
+
+        for dimension, labels in distribution.items():
+            self.assertEqual(sum(labels.values()), size, dimension)
+        # Every synthetic variant carries a grind and a pack size attribute
+        self.assertEqual(set(distribution["grind"]), {"whole", "filter", "espresso", "capsules"})
+        self.assertEqual(set(distribution["weight"]), {"1kg", "250g", "25caps"})
+        _logger.info(
+            "Moyee classifier benchmark: %s variants in %.3fs (%.1f us/variant, compile %.4fs), distribution %s",
+            size, seconds, seconds / size * 1e6, compile_seconds, distribution,
+        )
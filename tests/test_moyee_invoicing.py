@@ -0,0 +1,39 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_invoicing.py
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeRecurringInvoicing(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(3, 4, removed_share=0.25)
+        cls.next_date_field = cls.env["sale.order"]._moyee_get_next_date_field()
+        if cls.next_date_field:
+            cls.orders.write({cls.next_date_field: fields.Date.today()})
+
+    def test_fallback_domain_on_empty_recordset(self):
+        SaleOrder = self.env["sale.order"]
+        with patch.object(type(SaleOrder), "_recurring_invoice_domain", None, create=True):
+            domain = SaleOrder._moyee_recurring_invoice_domain()
+        self.assertIn(("is_subscription_order", "=", True), domain)
+        self.assertIn(("state", "=", "sale"), domain)
+        if self.next_date_field:
+            self.assertIn((self.next_date_field, "<=", fields.Date.today()), domain)
+
+    def test_cron_with_fallback_domain(self):
+        SaleOrder = self.env["sale.order"]
+        with patch.object(type(SaleOrder), "_recurring_invoice_domain", None, create=True):
+            stats = SaleOrder._cron_moyee_recurring_invoice(chunk_size=2)
+
+        self.assertGreaterEqual(stats["subscriptions"], len(self.orders))
+        self.assertFalse(stats["failed"])
+        invoiced_lines = self.orders.invoice_ids.invoice_line_ids.sale_line_ids
+        self.assertTrue(invoiced_lines)
+        self.assertFalse(invoiced_lines.filtered("x_moyee_is_removed"), "Soft-removed lines must not be invoiced")
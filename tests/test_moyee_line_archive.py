@@ -0,0 +1,55 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_line_archive.py
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeLineArchive(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(1, 2)
+        cls.order = cls.orders
+        if "picking_ids" in cls.order._fields:
+            # Settle the stock moves so only the invoicing state decides
+            cls.order.picking_ids.action_cancel()
+        cls.invoice = cls.order._create_invoices()
+        cls.invoice.action_post()
+        cls.line = cls.order._moyee_get_sub_lines()[:1]
+        cls.line.write({
+            "x_moyee_is_removed": True,
+            "product_uom_qty": 0.0,
+            "x_moyee_removed_on": fields.Datetime.now() - timedelta(days=365),
+        })
+
+    def test_invoiced_removed_line_is_archived_with_its_invoice(self):
+        invoice_lines = self.line.invoice_lines
+        self.assertTrue(invoice_lines)
+        line_id = self.line.id
+
+        archive = self.line._moyee_archive_lines()
+
+        self.assertEqual(len(archive), 1)
+        self.assertFalse(self.env["sale.order.line"].browse(line_id).exists())
+        self.assertEqual(archive.line_id, line_id)
+        self.assertEqual(archive.invoice_line_ids, invoice_lines)
+        self.assertEqual(archive.invoice_line_ids.move_id, self.invoice)
+        self.assertEqual(self.invoice.state, "posted")
+        self.assertIn(self.invoice, self.order.invoice_ids)
+        self.assertEqual(self.order.invoice_count, len(self.order.invoice_ids))
+
+    def test_lines_with_moves_in_progress_are_not_selected(self):
+        if "move_ids" not in self.line._fields:
+            self.skipTest("stock is not installed")
+        Archive = self.env["moyee.subscription.line.archive"]
+        older_than = fields.Datetime.now()
+        self.line.move_ids.filtered(lambda m: m.state == "cancel").write({"state": "confirmed"})
+        if not self.line.move_ids:
+            self.skipTest("the line has no stock moves")
+        domain = Archive._moyee_archivable_line_domain(older_than) + [("id", "=", self.line.id)]
+        self.assertFalse(self.env["sale.order.line"].search(domain))
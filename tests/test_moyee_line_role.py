@@ -0,0 +1,39 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_line_role.py
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeLineRole(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.order = cls._moyee_make_subscriptions(1, 2)
+        Product = cls.env["product.product"]
+        cls.service_discount = Product.create({"name": "Moyee Welcome Discount", "type": "service", "list_price": -5.0})
+        cls.goods_discount = Product.create({"name": "Moyee Promo Beans", "type": "consu", "list_price": -2.0})
+
+    def _moyee_add_line(self, product):
+        return self.env["sale.order.line"].create({
+            "order_id": self.order.id,
+            "product_id": product.id,
+            "product_uom_qty": 1.0,
+            "price_unit": product.list_price,
+        })
+
+    def test_service_discount_line_stays_delivery(self):
+        line = self._moyee_add_line(self.service_discount)
+        self.assertEqual(line.x_moyee_line_role, "service")
+        self.assertTrue(line._moyee_is_delivery_line())
+        self.assertNotIn(line, self.order._moyee_get_sub_lines())
+        with self.assertRaises(UserError):
+            line._moyee_block_delivery_product()
+
+    def test_goods_discount_line_is_sub_line(self):
+        line = self._moyee_add_line(self.goods_discount)
+        self.assertEqual(line.x_moyee_line_role, "discount")
+        self.assertFalse(line._moyee_is_delivery_line())
+        self.assertIn(line, self.order._moyee_get_sub_lines())
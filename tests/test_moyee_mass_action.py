@@ -0,0 +1,70 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_mass_action.py
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeMassAction(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(3, 2)
+
+    def setUp(self):
+        super().setUp()
+        if "subscription_state" not in self.orders._fields:
+            self.skipTest("subscription_state is not available in this build")
+
+    def test_resume_job_only_touches_paused_subscriptions(self):
+        running, paused, churned = self.orders
+        paused.write({"subscription_state": "4_paused"})
+        churned.write({"subscription_state": "6_churn"})
+
+        job = self.env["sale.order"]._moyee_mass_subscription_action([("id", "in", self.orders.ids)], "resume", chunk_size=1)
+        self.assertEqual(job.state, "queued")
+        self.assertEqual(job.subscription_count, 1)
+        # Queued, not applied in the caller's transaction
+        self.assertEqual(paused.subscription_state, "4_paused")
+
+        self.env["moyee.subscription.mass.job"]._cron_moyee_process_mass_jobs()
+        self.assertEqual(job.state, "done")
+        self.assertEqual((job.processed_count, job.updated_count, job.failed_count), (1, 1, 0))
+        self.assertEqual(paused.subscription_state, "3_progress")
+        self.assertEqual(running.subscription_state, "3_progress")
+        self.assertEqual(churned.subscription_state, "6_churn")
+
+    def test_pause_job_skips_non_running_subscriptions(self):
+        running, paused, churned = self.orders
+        paused.write({"subscription_state": "4_paused"})
+        churned.write({"subscription_state": "6_churn"})
+
+        job = self.env["sale.order"]._moyee_mass_subscription_action([("id", "in", self.orders.ids)], "pause")
+        self.env["moyee.subscription.mass.job"]._cron_moyee_process_mass_jobs()
+        self.assertEqual(job.updated_count, 1)
+        self.assertEqual(running.subscription_state, "4_paused")
+        self.assertEqual(churned.subscription_state, "6_churn")
+
+    def test_failing_order_is_isolated_and_listed(self):
+        SaleOrder = self.env["sale.order"]
+        broken = self.orders[1]
+        mass_apply = type(SaleOrder)._moyee_mass_apply
+
+        def _moyee_mass_apply(orders, action, pause_until=None):
+            if broken in orders:
+                raise UserError("Moyee test failure")
+            return mass_apply(orders, action, pause_until=pause_until)
+
+        job = SaleOrder._moyee_mass_subscription_action([("id", "in", self.orders.ids)], "pause", chunk_size=3)
+        with patch.object(type(SaleOrder), "_moyee_mass_apply", _moyee_mass_apply):
+            self.env["moyee.subscription.mass.job"]._cron_moyee_process_mass_jobs()
+
+        self.assertEqual(job.state, "done")
+        self.assertEqual((job.processed_count, job.updated_count, job.failed_count), (3, 2, 1))
+        self.assertEqual(job.failed_order_ids, broken)
+        self.assertEqual(broken.subscription_state, "3_progress")
+        self.assertEqual((self.orders - broken).mapped("subscription_state"), ["4_paused", "4_paused"])
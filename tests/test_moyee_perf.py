@@ -0,0 +1,124 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_perf.py
+import cProfile
+import os
+import pstats
+
+from odoo.tests import tagged
+
+from ..models.sale_order import MOYEE_NON_RECURRING_AMOUNT_FIELDS, MOYEE_RECURRING_AMOUNT_FIELDS
+from .common import MoyeeSubscriptionCase
+
+# Budgets for the recurring invoicing pipeline. Run with --test-tags moyee_perf.
+# The _get_invoiceable_lines and _compute_amounts budgets do not depend on the
+# number of subscriptions: a regression that adds per-order or per-line queries
+# or calls fails them. _create_invoices creates one account.move per order, so
+# its budget is per subscription.
+MOYEE_PERF_SUBSCRIPTIONS = 20
+MOYEE_PERF_LINES = 10
+MOYEE_INVOICEABLE_LINES_QUERIES = 6
+MOYEE_CREATE_INVOICES_QUERIES_PER_ORDER = 25
+
+# Mass recompute after a pricelist update: reads are prefetched 1,000 records at
+# a time and the new amounts are flushed in a few UPDATEs
+MOYEE_COMPUTE_AMOUNTS_ORDERS = 1000
+MOYEE_COMPUTE_AMOUNTS_LINES = 4
+MOYEE_COMPUTE_AMOUNTS_QUERIES = 60
+# Calls into this module's Python code during the recompute (the override itself)
+MOYEE_COMPUTE_AMOUNTS_MODULE_CALLS = 5
+
+MOYEE_MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOYEE_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@tagged("post_install", "-at_install", "moyee_perf")
+class TestMoyeeInvoicingPerf(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(
+            MOYEE_PERF_SUBSCRIPTIONS, MOYEE_PERF_LINES,
+            removed_share=0.2, delivery_share=0.1, display_share=0.1,
+        )
+
+    def _moyee_count_queries(self, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.cr.sql_log_count
+        value = func()
+        self.env.flush_all()
+        return value, self.cr.sql_log_count - before
+
+    def test_invoiceable_lines_query_budget(self):
+        self.env.invalidate_all()
+        with self.assertQueryCount(MOYEE_INVOICEABLE_LINES_QUERIES):
+            lines = self.orders._get_invoiceable_lines()
+
+        self.assertFalse(lines.filtered("x_moyee_is_removed"), "Soft-removed lines must not be invoiced")
+        # Subscriptions invoice exactly their active lines: no section, removed or zero-quantity line
+        self.assertEqual(lines, self.orders.order_line.filtered("x_moyee_is_active_line"))
+
+    def test_create_invoices_query_budget(self):
+        invoiceable = self.orders._get_invoiceable_lines().filtered(lambda l: not l.display_type)
+        invoices, queries = self._moyee_count_queries(lambda: self.orders._create_invoices())
+
+        self.assertTrue(invoices)
+        # Row budget: one invoice line per invoiceable product line, nothing created then dropped
+        product_lines = invoices.invoice_line_ids.filtered(lambda l: l.display_type == "product")
+        self.assertEqual(len(product_lines), len(invoiceable))
+        self.assertLessEqual(
+            queries, MOYEE_CREATE_INVOICES_QUERIES_PER_ORDER * len(self.orders),
+            "_create_invoices ran %s queries for %s subscriptions" % (queries, len(self.orders)),
+        )
+
+
+@tagged("post_install", "-at_install", "moyee_perf")
+class TestMoyeeComputeAmountsPerf(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(
+            MOYEE_COMPUTE_AMOUNTS_ORDERS, MOYEE_COMPUTE_AMOUNTS_LINES, removed_share=0.25,
+        )
+        cls.amount_fields = [
+            fname for fname in MOYEE_RECURRING_AMOUNT_FIELDS + MOYEE_NON_RECURRING_AMOUNT_FIELDS
+            if fname in cls.orders._fields
+        ]
+
+    def test_compute_amounts_budget(self):
+        if not self.amount_fields:
+            self.skipTest("no recurring amount fields in this build")
+        orders = self.orders
+        self.env.flush_all()
+        self.env.invalidate_all()
+        # Recompute every field of _compute_amounts the way a mass update does
+        for field in self.env.registry.field_computed[orders._fields["amount_untaxed"]]:
+            self.env.add_to_compute(field, orders)
+
+        profiler = cProfile.Profile()
+        queries_before = self.cr.sql_log_count
+        profiler.runcall(self.env.flush_all)
+        queries = self.cr.sql_log_count - queries_before
+        module_calls = sum(
+            stat[1] for (filename, _line, _func), stat in pstats.Stats(profiler).stats.items()
+            if os.path.abspath(filename).startswith(MOYEE_MODULE_DIR)
+            and not os.path.abspath(filename).startswith(MOYEE_TESTS_DIR)
+        )
+
+        self.assertLessEqual(
+            queries, MOYEE_COMPUTE_AMOUNTS_QUERIES,
+            "_compute_amounts ran %s queries for %s subscriptions" % (queries, len(orders)),
+        )
+        self.assertLessEqual(
+            module_calls, MOYEE_COMPUTE_AMOUNTS_MODULE_CALLS,
+            "_compute_amounts made %s calls into the module for %s subscriptions" % (module_calls, len(orders)),
+        )
+        for order in orders:
+            active = order.order_line.filtered("x_moyee_is_active_line")
+            expected = dict(zip(MOYEE_RECURRING_AMOUNT_FIELDS, (
+                sum(active.mapped("price_subtotal")), sum(active.mapped("price_tax")), sum(active.mapped("price_total")),
+            )))
+            expected.update(dict.fromkeys(MOYEE_NON_RECURRING_AMOUNT_FIELDS, 0.0))
+            for fname in self.amount_fields:
+                self.assertAlmostEqual(order[fname], expected[fname], msg="%s of %s" % (fname, order.name))
@@ -0,0 +1,50 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_portal_access.py
+from odoo.exceptions import AccessError, UserError
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeePortalAccess(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(2, 1)
+        Partner = cls.env["res.partner"]
+        cls.company_partner = Partner.create({"name": "Moyee Test Company", "is_company": True})
+        cls.other_company_partner = Partner.create({"name": "Moyee Other Company", "is_company": True})
+        cls.partner.parent_id = cls.company_partner
+        cls.contact = Partner.create({"name": "Moyee Test Contact", "parent_id": cls.company_partner.id})
+        cls.portal_user = cls.env["res.users"].create({
+            "name": "Moyee Portal User",
+            "login": "moyee_portal_user",
+            "partner_id": cls.contact.id,
+            "groups_id": [(6, 0, [cls.env.ref("base.group_portal").id])],
+        })
+
+    def _check(self, order):
+        return order.with_user(self.portal_user).sudo()._moyee_portal_check_access(portal_user=self.portal_user)
+
+    def test_memo_follows_portal_contact_company(self):
+        order = self.orders[0]
+        self.assertTrue(self._check(order))
+        # Same transaction: the contact leaves the customer's company
+        self.contact.parent_id = self.other_company_partner
+        with self.assertRaises(AccessError):
+            self._check(order)
+
+    def test_memo_follows_order_customer_company(self):
+        order = self.orders[0]
+        self.assertTrue(self._check(order))
+        self.partner.parent_id = self.other_company_partner
+        with self.assertRaises(AccessError):
+            self._check(order)
+
+    def test_memo_follows_order_state(self):
+        order = self.orders[1]
+        self.assertTrue(self._check(order))
+        order.write({"state": "cancel"})
+        with self.assertRaises(UserError):
+            self._check(order)
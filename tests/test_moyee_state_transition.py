@@ -0,0 +1,52 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_state_transition.py
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeStateTransition(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(3, 2)
+
+    def setUp(self):
+        super().setUp()
+        if "subscription_state" not in self.orders._fields:
+            self.skipTest("subscription_state is not available in this build")
+
+    def test_pause_and_resume_from_allowed_states(self):
+        order = self.orders[0]
+        self.assertEqual(order.subscription_state, "3_progress")
+        order._moyee_set_subscription_paused_state(paused=True)
+        self.assertEqual(order.subscription_state, "4_paused")
+        order._moyee_set_subscription_paused_state(paused=False)
+        self.assertEqual(order.subscription_state, "3_progress")
+
+    def test_resume_refuses_other_states(self):
+        order = self.orders[1]
+        order.write({"subscription_state": "6_churn"})
+        with self.assertRaises(UserError):
+            order._moyee_apply_state_transition("resume")
+        self.assertEqual(order.subscription_state, "6_churn")
+
+    def test_non_strict_transition_skips_other_states(self):
+        running, churned = self.orders[0], self.orders[2]
+        churned.write({"subscription_state": "6_churn"})
+        (running | churned)._moyee_apply_state_transition("pause", strict=False)
+        self.assertEqual(running.subscription_state, "4_paused")
+        self.assertEqual(churned.subscription_state, "6_churn")
+
+    def test_renewal_subscriptions_pause_and_close(self):
+        keys = [key for key, _label in self.orders._fields["subscription_state"]._description_selection(self.env)]
+        if "2_renewal" not in keys:
+            self.skipTest("subscription_state has no renewal state in this build")
+        to_pause, to_close = self.orders[0], self.orders[1]
+        (to_pause | to_close).write({"subscription_state": "2_renewal"})
+        to_pause._moyee_apply_state_transition("pause")
+        self.assertEqual(to_pause.subscription_state, "4_paused")
+        to_close._moyee_apply_state_transition("close")
+        self.assertEqual(to_close.subscription_state, "6_churn")
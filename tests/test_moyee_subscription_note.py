@@ -0,0 +1,57 @@
+# File: moyee_subscription_portal_manager/tests/test_moyee_subscription_note.py
+from markupsafe import Markup
+
+from odoo.tests import tagged
+
+from .common import MoyeeSubscriptionCase
+
+
+@tagged("post_install", "-at_install")
+class TestMoyeeSubscriptionNote(MoyeeSubscriptionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls._moyee_make_subscriptions(2, 1)
+        Partner = cls.env["res.partner"]
+        cls.author_a = Partner.create({"name": "Moyee Note Author A"})
+        cls.author_b = Partner.create({"name": "Moyee Note Author B"})
+
+    def _new_messages(self, known):
+        return self.env["mail.message"].search([
+            ("model", "=", "sale.order"),
+            ("res_id", "in", self.orders.ids),
+            ("id", "not in", known.ids),
+        ])
+
+    def test_flush_merges_per_order_and_author(self):
+        Note = self.env["moyee.subscription.note"]
+        Note.search([]).unlink()
+        order_1, order_2 = self.orders
+        known = self._new_messages(self.env["mail.message"])
+
+        order_1._moyee_queue_note("first a < b", author_partner=self.author_a)
+        order_1._moyee_queue_note(Markup("<b>second</b>"), author_partner=self.author_a)
+        order_1._moyee_queue_note("other author", author_partner=self.author_b)
+        self.orders._moyee_queue_note("both orders", author_partner=self.author_a)
+        self.assertEqual(Note.search_count([]), 5)
+
+        self.assertEqual(Note._cron_moyee_flush_subscription_notes(), 5)
+        self.assertFalse(Note.search([]), "flushed notes must be deleted from the queue")
+
+        messages = self._new_messages(known)
+        self.assertEqual(len(messages), 3, "one message per (order, author)")
+        by_key = {(message.res_id, message.author_id): message for message in messages}
+        self.assertEqual(set(by_key), {
+            (order_1.id, self.author_a), (order_1.id, self.author_b), (order_2.id, self.author_a),
+        })
+
+        merged = str(by_key[order_1.id, self.author_a].body)
+        # Plain text is escaped once, markup is kept, queue order is preserved
+        self.assertIn("first a &lt; b", merged)
+        self.assertIn("<b>second</b>", merged)
+        self.assertNotIn("&lt;b&gt;", merged)
+        self.assertLess(merged.index("first"), merged.index("second"))
+        self.assertLess(merged.index("second"), merged.index("both orders"))
+        self.assertIn("other author", str(by_key[order_1.id, self.author_b].body))
+        self.assertIn("both orders", str(by_key[order_2.id, self.author_a].body))